@@ -1,51 +1,58 @@
+import logging
+import os
+
+import click
 from flask import Flask
-from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from flask_jwt_extended import JWTManager
-from flask_restx import Api
-import bcrypt
-
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "http://localhost:5173"}})
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///fashionstore.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_SECRET_KEY'] = 'your-secret-key'
-app.config['DEBUG'] = True
-
-# Initialize db
-db = SQLAlchemy()
-db.init_app(app)
-migrate = Migrate(app, db)
-jwt = JWTManager(app)
-
-# Debug db initialization
-with app.app_context():
-    print("DB initialized:", db.session)
-
-restx_api = Api(
-    app,
-    title='FashionStore API',
-    description='API for FashionStore',
-    doc='/swagger/',
-    authorizations={
-        'Bearer': {
-            'type': 'apiKey',
-            'in': 'header',
-            'name': 'Authorization',
-            'description': 'Enter your Bearer token in the format: Bearer <your-jwt-token>'
-        }
-    }
-)
-
-
-from models import User
-from api_doc import api_doc_bp
-from routes import api_ns
-
-restx_api.add_namespace(api_ns, path='/api')
-app.register_blueprint(api_doc_bp, url_prefix='/')
+
+from config import Config
+from engine import configure_engines, init_engines
+from extensions import cors, db, jwt, password_hasher, product_cache, product_fragment_cache, rate_limiter
+
+
+def create_app(config=Config):
+    app = Flask(__name__)
+    app.config.from_object(config)
+    configure_engines(app)
+
+    cors.init_app(app, resources={r"/api/*": {"origins": app.config['CORS_ORIGINS']}},
+                  expose_headers=app.config['CORS_EXPOSE_HEADERS'])
+    db.init_app(app)
+    init_engines(app)
+    jwt.init_app(app)
+    if click.get_current_context(silent=True) is not None:
+        # CLI only: Flask-Migrate pulls in Alembic, which is only needed by `flask db`
+        from flask_migrate import Migrate
+        from related import build_related_command
+        from retention import archive_command
+        Migrate(app, db)
+        app.cli.add_command(archive_command)
+        app.cli.add_command(build_related_command)
+
+    product_cache.configure(maxsize=app.config['PRODUCT_CACHE_SIZE'], ttl=app.config['PRODUCT_CACHE_TTL'])
+    product_fragment_cache.configure(maxsize=app.config['PRODUCT_FRAGMENT_CACHE_SIZE'],
+                                     ttl=app.config['PRODUCT_CACHE_TTL'])
+    password_hasher.configure(rounds=app.config['BCRYPT_ROUNDS'],
+                              workers=app.config['BCRYPT_WORKERS'],
+                              max_pending=app.config['BCRYPT_MAX_PENDING'])
+    rate_limiter.init_app(app)
+
+    from api_doc import create_api
+    from metrics import init_metrics
+    from routes import api_ns
+
+    api = create_api(app)
+    api.add_namespace(api_ns, path='/api')
+    init_metrics(app)
+
+    # Pre-fork servers (gunicorn --preload) fork after this point; a child
+    # must not reuse connections the parent may have opened.
+    with app.app_context():
+        engines = list(db.engines.values())
+    os.register_at_fork(after_in_child=lambda: [engine.dispose(close=False) for engine in engines])
+
+    return app
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    create_app().run(debug=True, host='127.0.0.1', port=5000)
@@ -0,0 +1,179 @@
+"""ASGI entry point: uvicorn asgi:application
+
+Every route is served by the Flask app through asgiref's WSGI adapter, so
+auth, validation and error responses are exactly those of `flask run`.
+Catalog reads take an async path first: cached list pages and products are
+answered on the event loop, and product lookups that miss the cache go
+through an async session instead of tying up an adapter thread.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from sqlalchemy import select
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+from werkzeug.wrappers import Request
+
+import serializers
+from app import create_app
+from engine import create_async_sessionmaker
+from extensions import product_cache, product_fragment_cache
+from metrics import instrument_engine, metrics
+from models import Product
+from routes import product_list_cache_key
+from serializers import Representation
+
+
+def build_environ(scope):
+    """The parts of a WSGI environ the catalog fast path looks at."""
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': unquote(scope['path']),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        if name in environ:
+            value = environ[name] + ',' + value
+        environ[name] = value
+    return environ
+
+
+def wsgi_adapter(flask_app, threads):
+    """asgiref's WSGI adapter, but on its own pool: the stock one is
+    thread-sensitive and runs every request on a single thread."""
+    executor = ThreadPoolExecutor(threads, thread_name_prefix='wsgi')
+
+    class Instance(WsgiToAsgiInstance):
+        run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func,
+                                     thread_sensitive=False, executor=executor)
+
+    async def wsgi(scope, receive, send):
+        await Instance(flask_app)(scope, receive, send)
+    return wsgi
+
+
+class CatalogASGI:
+    def __init__(self, flask_app):
+        config = flask_app.config
+        self.flask_app = flask_app
+        self.wsgi = wsgi_adapter(flask_app, config['ASGI_WSGI_THREADS'])
+        self.urls = flask_app.url_map.bind('localhost')
+        self.cors_origins = config['CORS_ORIGINS']
+        self.cors_expose = ', '.join(sorted(config['CORS_EXPOSE_HEADERS']))
+        self._sessionmaker = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            started = time.perf_counter()
+            request = Request(build_environ(scope))
+            handled = await self.catalog(request)
+            if handled is not None:
+                endpoint, response, queries, query_seconds = handled
+                self.add_cors_headers(request, response)
+                await self.send_response(send, response, scope['method'] == 'HEAD')
+                metrics.observe_request(endpoint, request.method, response.status_code,
+                                        time.perf_counter() - started, queries, query_seconds)
+                return
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._sessionmaker is not None:
+                    await self._sessionmaker.kw['bind'].dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @property
+    def sessionmaker(self):
+        if self._sessionmaker is None:
+            bind_key = 'read' if self.flask_app.config.get('READ_DATABASE_URI') else None
+            self._sessionmaker = create_async_sessionmaker(self.flask_app, bind_key)
+            instrument_engine(self._sessionmaker.kw['bind'].sync_engine, self.flask_app)
+        return self._sessionmaker
+
+    async def catalog(self, request):
+        """(endpoint, response, queries, query_seconds) for the requests the
+        async path can answer, None to hand the request to Flask."""
+        try:
+            endpoint, view_args = self.urls.match(request.path, request.method)
+        except (HTTPException, RequestRedirect):
+            return None
+
+        if endpoint == 'api_products':
+            # misses need the full keyset query, Flask fills the cache
+            entry = product_cache.get(product_list_cache_key(request.args))
+            if entry is None:
+                return None
+            return endpoint, entry.respond(request), 0, 0.0
+
+        if endpoint == 'api_product_item':
+            product_id = view_args['product_id']
+            key = ('product', product_id)
+            entry = product_cache.get(key)
+            queries, query_seconds = 0, 0.0
+            if entry is None:
+                fragment = product_fragment_cache.get(product_id)
+                if fragment is None:
+                    queries, query_started = 1, time.perf_counter()
+                    fragment = await self.load_product(product_id)
+                    query_seconds = time.perf_counter() - query_started
+                    if fragment is None:
+                        return None  # Flask renders the 404
+                    product_fragment_cache.set(product_id, fragment)
+                entry = Representation(fragment)
+                product_cache.set(key, entry, (f'product:{product_id}',))
+            return endpoint, entry.respond(request), queries, query_seconds
+
+        return None
+
+    async def load_product(self, product_id):
+        columns = [getattr(Product, f) for f in serializers.PRODUCT_FIELDS]
+        async with self.sessionmaker() as session:
+            row = (await session.execute(select(*columns).where(Product.id == product_id, Product.deleted_at.is_(None)))).first()
+        return serializers.encode_product(row) if row is not None else None
+
+    def add_cors_headers(self, request, response):
+        # same headers Flask-CORS adds for /api/* in the WSGI path
+        origin = request.headers.get('Origin')
+        if origin:
+            allowed = [origin] if origin in self.cors_origins else []
+        else:
+            allowed = sorted(self.cors_origins)
+        if not allowed:
+            return
+        for value in allowed:
+            response.headers.add('Access-Control-Allow-Origin', value)
+        response.headers['Access-Control-Expose-Headers'] = self.cors_expose
+        if len(self.cors_origins) > 1:
+            response.vary.add('Origin')
+
+    @staticmethod
+    async def send_response(send, response, head):
+        body = b'' if head else response.get_data()
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(k.lower().encode('latin1'), v.encode('latin1'))
+                        for k, v in response.headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+application = CatalogASGI(create_app())
@@ -0,0 +1,98 @@
+import threading
+import time
+from datetime import timezone
+from functools import wraps
+
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+
+from models import User
+
+
+def is_admin(user_id):
+    user = User.query.get(user_id)
+    return user.is_admin if user else False
+
+
+def epoch(dt):
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RoleChangeList:
+    """Users whose role changed recently, so role claims in tokens issued
+    before the change are no longer trusted.
+
+    Tokens carry the `role_changed_at` they were issued under as `role_at`,
+    which keeps its sub-second precision; `iat` is whole seconds, so a
+    change and a login in the same second could not be told apart by it.
+
+    Changes made by this process are recorded immediately; changes made by
+    other workers are picked up by re-reading `users.role_changed_at` at
+    most once every `refresh_interval` seconds instead of once per request.
+    """
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._changed = {}
+        self._since = None
+        self._next_refresh = 0
+        self._lock = threading.Lock()
+
+    def record(self, user_id, changed_at):
+        with self._lock:
+            self._changed[user_id] = max(self._changed.get(user_id, 0), epoch(changed_at))
+
+    def is_stale(self, user_id, claims):
+        self._maybe_refresh()
+        changed = self._changed.get(user_id, 0)
+        if 'role_at' in claims:
+            return changed > claims['role_at']
+        # issued before the role_at claim: only iat to go by
+        return changed >= claims['iat']
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        with self._lock:
+            if now < self._next_refresh:
+                return
+            self._next_refresh = now + self.refresh_interval
+            query = User.query.with_entities(User.id, User.role_changed_at) \
+                .filter(User.role_changed_at.isnot(None))
+            if self._since is not None:
+                query = query.filter(User.role_changed_at > self._since)
+            for user_id, changed_at in query:
+                self._changed[user_id] = max(self._changed.get(user_id, 0), epoch(changed_at))
+                if self._since is None or changed_at > self._since:
+                    self._since = changed_at
+
+
+role_changes = RoleChangeList()
+
+
+def role_claims(user):
+    """Claims for an access token: the role and the role change it reflects."""
+    return {
+        'role': 'admin' if user.is_admin else 'user',
+        'role_at': epoch(user.role_changed_at) if user.role_changed_at else 0
+    }
+
+
+def admin_required(fn):
+    """Authorize admin routes from the token's role claim.
+
+    Tokens issued before the role claim existed fall back to a user lookup.
+    """
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        claims = get_jwt()
+        user_id = get_jwt_identity()
+        if 'role' in claims:
+            allowed = claims['role'] == 'admin' and not role_changes.is_stale(user_id, claims)
+        else:
+            allowed = is_admin(user_id)
+        if not allowed:
+            return {'message': 'Admin access required'}, 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,175 @@
+"""Concurrent-connection throughput: WSGI (threaded werkzeug) vs ASGI (uvicorn).
+
+    python benchmarks/bench_asgi.py --connections 64 --requests 4000
+
+Seeds a temporary SQLite database, starts both servers on it as
+subprocesses and drives the same mix of product detail, product list and
+authenticated cart reads at each over --connections concurrent keep-alive
+connections. Needs uvicorn and aiosqlite.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SERVERS = {
+    'wsgi': [sys.executable, '-m', 'flask', 'run', '--no-reload', '--with-threads', '--port', '{port}'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', '{port}',
+             '--log-level', 'warning', '--no-access-log'],
+}
+
+
+def seed(products, users):
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+    from extensions import db
+    from models import Cart, Product, User
+
+    app = create_app()
+
+    rng = random.Random(7)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Product.__table__), [{
+            'name': f'product {i}', 'description': 'benchmark product', 'price': round(rng.uniform(5, 300), 2),
+            'image_url': f'https://example.com/{i}.jpg', 'stock': 100, 'category': f'cat{i % 10}',
+        } for i in range(products)])
+        db.session.execute(db.insert(User.__table__), [{
+            'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x',
+        } for i in range(users)])
+        db.session.execute(db.insert(Cart.__table__), [{
+            'user_id': u + 1, 'product_id': rng.randint(1, products), 'quantity': 1,
+        } for u in range(users)])
+        db.session.commit()
+        return [create_access_token(identity=u + 1) for u in range(users)]
+
+
+def start(mode, port, env):
+    cmd = [part.format(port=port) for part in SERVERS[mode]]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def fetch(conn, port, path, headers):
+    """One GET over a keep-alive connection, reconnecting when the server
+    closed it. A raw client keeps the load generator's own CPU cost low."""
+    reader, writer = conn
+    if writer is None or writer.is_closing():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f'GET {path} HTTP/1.1', f'Host: 127.0.0.1:{port}']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin1'))
+    head = await reader.readuntil(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin1').split('\r\n')
+    response_headers = {}
+    for line in header_lines:
+        if line:
+            name, _, value = line.partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+    if 'content-length' in response_headers:
+        await reader.readexactly(int(response_headers['content-length']))
+    else:
+        await reader.read()
+    if response_headers.get('connection', '').lower() == 'close' or status_line.startswith('HTTP/1.0'):
+        writer.close()
+        writer = None
+    return int(status_line.split()[1]), (reader, writer)
+
+
+async def drive(port, plan, connections):
+    latencies = {}
+    errors = 0
+    queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    async def worker():
+        nonlocal errors
+        conn = (None, None)
+        while not queue.empty():
+            kind, path, headers = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                status, conn = await fetch(conn, port, path, headers)
+                if status != 200:
+                    errors += 1
+            except (OSError, asyncio.IncompleteReadError):
+                errors += 1
+                conn = (None, None)
+            latencies.setdefault(kind, []).append(time.perf_counter() - started)
+        if conn[1] is not None:
+            conn[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+
+    report = {'rps': round(len(plan) / elapsed, 1), 'errors': errors}
+    for kind, values in sorted(latencies.items()):
+        values.sort()
+        report[kind] = {'p50_ms': round(percentile(values, 50) * 1000, 2),
+                        'p99_ms': round(percentile(values, 99) * 1000, 2)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=20_000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--modes', default='wsgi,asgi')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+               FLASK_APP='app.py', FLASK_DEBUG='0')
+    os.environ.update(env)
+    tokens = seed(args.products, args.users)
+
+    rng = random.Random(11)
+    plan = []
+    for _ in range(args.requests):
+        roll = rng.random()
+        if roll < 0.6:
+            plan.append(('product', f'/api/products/{rng.randint(1, args.products)}', {}))
+        elif roll < 0.85:
+            plan.append(('list', f'/api/products?category=cat{rng.randrange(10)}&limit=20', {}))
+        else:
+            plan.append(('cart', '/api/cart', {'Authorization': f'Bearer {rng.choice(tokens)}'}))
+
+    results = {}
+    for port, mode in enumerate(args.modes.split(','), start=8801):
+        proc = start(mode, port, env)
+        try:
+            results[mode] = asyncio.run(drive(port, plan, args.connections))
+        finally:
+            proc.terminate()
+            proc.wait()
+    print(json.dumps({'connections': args.connections, 'requests': args.requests, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
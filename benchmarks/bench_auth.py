@@ -0,0 +1,82 @@
+"""Per-request auth overhead on the cart endpoints.
+
+    python benchmarks/bench_auth.py --requests 5000
+
+Two measurements, each with the verified-token cache off
+(JWT_VERIFIED_CACHE_SIZE=0) and on:
+  - auth only: the before_request hooks plus verify_jwt_in_request(),
+    less the cost of the bare request context, i.e. what every
+    @jwt_required() route pays before its view runs;
+  - end to end: GET /api/cart and GET /api/cart/summary through the test
+    client, for a few hundred users each reusing their token, as a logged-in
+    browser does.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=200)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from flask_jwt_extended import create_access_token, verify_jwt_in_request
+    from app import create_app
+    from config import Config
+    from extensions import db
+    from models import Cart, Product, User
+
+    report = {'requests': args.requests, 'users': args.users}
+    for name, cache_size in (('cache_off', 0), ('cache_on', 10000)):
+        app = create_app(type('BenchConfig', (Config,), {'JWT_VERIFIED_CACHE_SIZE': cache_size}))
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.execute(db.insert(Product.__table__), [
+                {'name': f'p{i}', 'description': 'd', 'price': 1.0, 'image_url': 'x', 'stock': 100,
+                 'category': 'bench'} for i in range(20)])
+            db.session.execute(db.insert(User.__table__), [
+                {'username': f'u{i}', 'email': f'u{i}@example.com', 'password': 'x'} for i in range(args.users)])
+            db.session.execute(db.insert(Cart.__table__), [
+                {'user_id': u + 1, 'product_id': p + 1, 'quantity': 1} for u in range(args.users) for p in range(3)])
+            db.session.commit()
+            headers = [{'Authorization': f'Bearer {create_access_token(identity=i + 1)}'} for i in range(args.users)]
+
+        def per_request_us(fn):
+            started = time.perf_counter()
+            for i in range(args.requests):
+                with app.test_request_context('/api/cart', headers=headers[i % args.users]):
+                    fn()
+            return (time.perf_counter() - started) / args.requests * 1e6
+
+        def authenticate():
+            app.preprocess_request()
+            verify_jwt_in_request()
+
+        # the request context itself is not auth overhead
+        auth_us = per_request_us(authenticate) - per_request_us(lambda: None)
+
+        http = app.test_client()
+        timings = {}
+        for path in ('/api/cart', '/api/cart/summary'):
+            started = time.perf_counter()
+            for i in range(args.requests):
+                assert http.get(path, headers=headers[i % args.users]).status_code == 200
+            timings[path] = round((time.perf_counter() - started) / args.requests * 1000, 3)
+        report[name] = {'auth_us_per_request': round(auth_us, 1),
+                        **{f'{path}_ms': ms for path, ms in timings.items()}}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
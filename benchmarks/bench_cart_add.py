@@ -0,0 +1,85 @@
+"""Concurrent add-to-cart benchmark.
+
+    python benchmarks/bench_cart_add.py --clients 16 --adds 200 --products 5
+
+Seeds a temporary SQLite database, then has every client hammer
+POST /api/cart for the same user and a handful of products, which is the
+worst case for duplicate lines. Reports adds/sec and checks that every
+(user, product) pair ended up as exactly one line holding the full quantity.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--adds', type=int, default=200, help='adds per client')
+    parser.add_argument('--products', type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from extensions import db
+    from models import Cart, Product, User
+
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password='x')
+        db.session.add(user)
+        db.session.add_all([
+            Product(name=f'p{i}', description='d', price=1.0, image_url='x',
+                    stock=1_000_000, category='bench')
+            for i in range(args.products)
+        ])
+        db.session.commit()
+        user_id = user.id
+        headers = {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+    errors = []
+
+    def client(n):
+        http = app.test_client()
+        for i in range(args.adds):
+            product_id = (n + i) % args.products + 1
+            r = http.post('/api/cart', json={'product_id': product_id, 'quantity': 1}, headers=headers)
+            if r.status_code != 201:
+                errors.append(r.status_code)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        list(pool.map(client, range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        lines = Cart.query.filter_by(user_id=user_id).all()
+        total = sum(line.quantity for line in lines)
+
+    requests = args.clients * args.adds
+    print(json.dumps({
+        'clients': args.clients,
+        'requests': requests,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'adds_per_sec': round(requests / elapsed, 2),
+        'cart_lines': len(lines),
+        'expected_lines': args.products,
+        'total_quantity': total,
+        'expected_quantity': requests - len(errors),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
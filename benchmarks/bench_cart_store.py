@@ -0,0 +1,113 @@
+"""Cart traffic with and without the write-back cart store.
+
+    python benchmarks/bench_cart_store.py --users 200 --operations 30
+
+Seeds a temporary SQLite database, then replays the same mix of cart adds,
+quantity changes and cart views for --users users, first straight against
+the cart table and then with CART_STORE_ENABLED. Reports time, SQL
+statements and commits per cart operation; the store's numbers include
+the final flush that writes every cart out.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--operations', type=int, default=30, help='cart operations per user')
+    parser.add_argument('--products', type=int, default=1000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import create_app
+    from extensions import db
+    from models import Product, User
+    from routes import cart_store
+
+    app = create_app()
+    # the interval flush would land at random points of the run; time the final one instead
+    app.config['CART_STORE_FLUSH_INTERVAL'] = 3600
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Product.__table__), [
+            {'name': f'p{i}', 'description': 'd', 'price': 1.0, 'image_url': 'x',
+             'stock': 1_000_000, 'category': 'bench'} for i in range(args.products)])
+        db.session.execute(db.insert(User.__table__), [
+            {'username': f'u{i}', 'email': f'u{i}@example.com', 'password': 'x'}
+            for i in range(2 * args.users)])
+        db.session.commit()
+        tokens = [create_access_token(identity=i + 1) for i in range(2 * args.users)]
+
+    # adds, then quantity changes on lines already in the cart, with a view every few operations
+    rng = random.Random(5)
+    scripts = []
+    for _ in range(args.users):
+        script = []
+        for n in range(args.operations):
+            if n % 5 == 4:
+                script.append(('view', None, None))
+            elif n < 3 or rng.random() < 0.5:
+                script.append(('add', rng.randint(1, args.products), rng.randint(1, 3)))
+            else:
+                script.append(('update', None, rng.randint(1, 5)))
+        scripts.append(script)
+
+    counts = {'statements': 0, 'commits': 0}
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _count_statement(*_):
+        counts['statements'] += 1
+
+    @event.listens_for(Engine, 'commit')
+    def _count_commit(*_):
+        counts['commits'] += 1
+
+    def replay(http, headers, script):
+        line_ids = []
+        for op, product_id, quantity in script:
+            if op == 'add':
+                assert http.post('/api/cart', json={'product_id': product_id, 'quantity': quantity},
+                                 headers=headers).status_code == 201
+            elif op == 'view':
+                line_ids = [line['id'] for line in http.get('/api/cart', headers=headers).json]
+            elif line_ids:
+                assert http.put(f'/api/cart/{rng.choice(line_ids)}', json={'quantity': quantity},
+                                headers=headers).status_code == 200
+
+    http = app.test_client()
+    operations = args.users * args.operations
+    report = {'users': args.users, 'operations_per_user': args.operations}
+    for offset, (name, enabled) in enumerate((('database', False), ('write_back', True))):
+        app.config['CART_STORE_ENABLED'] = enabled
+        counts.update(statements=0, commits=0)
+        start = time.perf_counter()
+        for i, script in enumerate(scripts):
+            replay(http, {'Authorization': f'Bearer {tokens[offset * args.users + i]}'}, script)
+        if enabled:
+            cart_store.flush()
+        elapsed = time.perf_counter() - start
+        report[name] = {
+            'ms_per_operation': round(elapsed / operations * 1000, 3),
+            'statements_per_operation': round(counts['statements'] / operations, 2),
+            'commits_per_operation': round(counts['commits'] / operations, 2),
+        }
+    cart_store.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
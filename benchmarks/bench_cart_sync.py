@@ -0,0 +1,91 @@
+"""Guest cart sync after login: one POST /api/cart per item vs POST /api/cart/batch.
+
+    python benchmarks/bench_cart_sync.py --users 200 --items 20
+
+Seeds a temporary SQLite database, then syncs the same guest carts for
+--users users both ways and reports time, SQL statements and commits per
+synced cart.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--items', type=int, default=20, help='items in each guest cart')
+    parser.add_argument('--products', type=int, default=1000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import create_app
+    from extensions import db
+    from models import Product, User
+
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Product.__table__), [
+            {'name': f'p{i}', 'description': 'd', 'price': 1.0, 'image_url': 'x',
+             'stock': 1_000_000, 'category': 'bench'} for i in range(args.products)])
+        db.session.execute(db.insert(User.__table__), [
+            {'username': f'u{i}', 'email': f'u{i}@example.com', 'password': 'x'}
+            for i in range(2 * args.users)])
+        db.session.commit()
+        tokens = [create_access_token(identity=i + 1) for i in range(2 * args.users)]
+
+    rng = random.Random(3)
+    carts = [[(product_id, rng.randint(1, 3)) for product_id in rng.sample(range(1, args.products + 1), args.items)]
+             for _ in range(args.users)]
+
+    counts = {'statements': 0, 'commits': 0}
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _count_statement(*_):
+        counts['statements'] += 1
+
+    @event.listens_for(Engine, 'commit')
+    def _count_commit(*_):
+        counts['commits'] += 1
+
+    def per_item(http, headers, cart):
+        for product_id, quantity in cart:
+            assert http.post('/api/cart', json={'product_id': product_id, 'quantity': quantity},
+                             headers=headers).status_code == 201
+
+    def batch(http, headers, cart):
+        operations = [{'op': 'add', 'product_id': p, 'quantity': q} for p, q in cart]
+        assert http.post('/api/cart/batch', json={'operations': operations},
+                         headers=headers).status_code == 200
+
+    http = app.test_client()
+    report = {'users': args.users, 'items': args.items}
+    for offset, (name, sync) in enumerate((('per_item', per_item), ('batch', batch))):
+        counts.update(statements=0, commits=0)
+        start = time.perf_counter()
+        for i, cart in enumerate(carts):
+            sync(http, {'Authorization': f'Bearer {tokens[offset * args.users + i]}'}, cart)
+        elapsed = time.perf_counter() - start
+        report[name] = {
+            'ms_per_cart': round(elapsed / args.users * 1000, 2),
+            'statements_per_cart': round(counts['statements'] / args.users, 1),
+            'commits_per_cart': round(counts['commits'] / args.users, 1),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Admin bulk work inline and as background jobs.
+
+    python benchmarks/bench_jobs.py --rows 50000 --carts 20000
+
+Seeds a temporary SQLite database, then
+- imports --rows products through POST /api/admin/products/import, once
+  inline and once with "Prefer: respond-async", and reports how long the
+  request was held open and when the job finished;
+- deletes a product held in --carts carts and reports the response time
+  and how long the cart_cleanup job took to empty those carts.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def wait(client, location, headers):
+    while True:
+        job = client.get(location, headers=headers).get_json()
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000, help='products per import')
+    parser.add_argument('--carts', type=int, default=20000, help='carts holding the deleted product')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from extensions import db
+    from models import Cart, Product, User
+
+    app = create_app()
+    app.config['JOB_SPOOL_DIR'] = tmpdir
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(User.__table__), [
+            {'username': f'u{i}', 'email': f'u{i}@example.com', 'password': 'x', 'is_admin': i == 0}
+            for i in range(args.carts + 1)])
+        db.session.add(Product(name='doomed', description='d', price=1.0, image_url='x', stock=1, category='bench'))
+        db.session.flush()
+        db.session.execute(db.insert(Cart.__table__), [
+            {'user_id': i + 2, 'product_id': 1, 'quantity': 1} for i in range(args.carts)])
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+
+    body = ''.join(json.dumps({'name': f'p{i}', 'description': 'd', 'price': 1.0, 'image_url': 'x',
+                               'stock': 5, 'category': f'c{i % 20}'}) + '\n'
+                   for i in range(args.rows)).encode()
+    client = app.test_client()
+    results = {}
+
+    started = time.perf_counter()
+    response = client.post('/api/admin/products/import', data=body,
+                           headers={**headers, 'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 200, response.get_json()
+    results['import_inline_response_s'] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    response = client.post('/api/admin/products/import', data=body,
+                           headers={**headers, 'Content-Type': 'application/x-ndjson', 'Prefer': 'respond-async'})
+    assert response.status_code == 202, response.get_json()
+    results['import_async_response_s'] = round(time.perf_counter() - started, 3)
+    job = wait(client, response.headers['Location'], headers)
+    assert job['status'] == 'succeeded', job
+    results['import_async_done_s'] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    response = client.delete('/api/admin/products/1', headers=headers)
+    results['delete_response_s'] = round(time.perf_counter() - started, 3)
+    job = wait(client, f"/api/admin/jobs/{response.get_json()['cleanup_job_id']}", headers)
+    results['cart_cleanup_done_s'] = round(time.perf_counter() - started, 3)
+    results['cart_lines_removed'] = job['result']['removed']
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Micro-benchmark for password verification under load.
+
+    python benchmarks/bench_login.py --threads 32 --logins 200
+
+Drives PasswordHasher.check from many request-like threads with the
+hasher configured as the app configures it (BCRYPT_ROUNDS, BCRYPT_WORKERS,
+BCRYPT_MAX_PENDING), so with more threads than pending slots the overload
+path runs: logins beyond the limit are shed with HasherBusy, which the
+login route answers with 503. A shed thread moves straight on to its next
+login, so --logins arrive as one burst. Reports, as JSON, logins/sec
+overall and per core, how many logins were shed, and the latency of served
+and shed logins; pass --max-pending >= --threads to see the queue unbounded.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from hashing import HasherBusy, PasswordHasher  # noqa: E402
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def latency(values):
+    values = sorted(values)
+    return {'p50_ms': ms(percentile(values, 50)), 'p95_ms': ms(percentile(values, 95)),
+            'p99_ms': ms(percentile(values, 99)), 'max_ms': ms(values[-1] if values else None)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=Config.BCRYPT_ROUNDS)
+    parser.add_argument('--workers', type=int, default=Config.BCRYPT_WORKERS, help='pool size, 0 for inline hashing')
+    parser.add_argument('--max-pending', type=int, default=Config.BCRYPT_MAX_PENDING,
+                        help='pending limit (default: BCRYPT_MAX_PENDING, i.e. 4 per worker)')
+    parser.add_argument('--threads', type=int, default=32, help='concurrent request threads')
+    parser.add_argument('--logins', type=int, default=200)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers, max_pending=args.max_pending)
+    hashed = hasher.hash('correct horse battery staple')
+    served, shed = [], []
+    lock = threading.Lock()
+
+    def login(_):
+        started = time.perf_counter()
+        try:
+            assert hasher.check('correct horse battery staple', hashed)
+            outcome = served
+        except HasherBusy:
+            outcome = shed
+        with lock:
+            outcome.append(time.perf_counter() - started)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+
+    cores = max(hasher.workers, 1)
+    print(json.dumps({
+        'rounds': args.rounds,
+        'workers': hasher.workers,
+        'max_pending': hasher.max_pending,
+        'threads': args.threads,
+        'logins': len(served),
+        'shed': len(shed),
+        'shed_ratio': round(len(shed) / args.logins, 3),
+        'seconds': round(elapsed, 3),
+        'logins_per_sec': round(len(served) / elapsed, 2),
+        'logins_per_sec_per_core': round(len(served) / elapsed / cores, 2),
+        'served_latency': latency(served),
+        'shed_latency': latency(shed),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
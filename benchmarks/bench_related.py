@@ -0,0 +1,89 @@
+"""Rebuilding "frequently added together" products from the cart table.
+
+    python benchmarks/bench_related.py --cart-rows 1000000 --products 20000
+
+Seeds a temporary SQLite database with --cart-rows cart lines: carts of 1-8
+products, where each cart mixes popular products with products near a
+random "theme" product, so there is real co-occurrence to find. Then runs
+related.rebuild() and reports load, compute and write time, how much the
+rebuild grew the process's peak RSS, and the latency of
+GET /api/products/<id>/related with the response cache cold and warm.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def cart_lines(rng, cart_rows, products):
+    import numpy as np
+
+    sizes = rng.integers(1, 9, size=cart_rows * 2 // 9 + 1)
+    users = np.repeat(np.arange(1, len(sizes) + 1), sizes)[:cart_rows]
+    themes = np.repeat(rng.integers(0, products, size=len(sizes)), sizes)[:cart_rows]
+    near = (themes + rng.integers(0, 15, size=cart_rows)) % products
+    popular = np.minimum(rng.zipf(1.3, size=cart_rows), products) - 1
+    product_ids = np.where(rng.random(cart_rows) < 0.8, near, popular) + 1
+    # a product appears once per cart
+    keys = np.unique(users * (products + 1) + product_ids)
+    return keys // (products + 1), keys % (products + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cart-rows', type=int, default=1000000)
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    import numpy as np
+    from app import create_app
+    from extensions import db, product_cache
+    from models import Cart, Product, User
+    import related
+
+    app = create_app()
+    users, product_ids = cart_lines(np.random.default_rng(11), args.cart_rows, args.products)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Product.__table__), [
+            {'name': f'p{i}', 'description': 'd', 'price': 1.0, 'image_url': 'x', 'stock': 10,
+             'category': f'c{i % 50}'} for i in range(args.products)])
+        db.session.execute(db.insert(User.__table__), [
+            {'username': f'u{i}', 'email': f'u{i}@example.com', 'password': 'x'} for i in range(int(users[-1]))])
+        for offset in range(0, len(users), 100000):
+            db.session.execute(db.insert(Cart.__table__), [
+                {'user_id': u, 'product_id': p, 'quantity': 1}
+                for u, p in zip(users[offset:offset + 100000].tolist(), product_ids[offset:offset + 100000].tolist())])
+        db.session.commit()
+
+        config = app.config
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report = related.rebuild(config['RELATED_TOP_K'], config['RELATED_MIN_SUPPORT'], config['RELATED_MAX_CART_SIZE'])
+        # ru_maxrss is in KiB on Linux; seeding peaked lower than the rebuild
+        report['peak_rss_growth_mb'] = round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1)
+
+    http = app.test_client()
+    rng = np.random.default_rng(5)
+    targets = rng.integers(1, args.products + 1, size=args.requests).tolist()
+    product_cache.configure(maxsize=args.requests, ttl=3600)
+    product_cache.clear()
+    # first pass fills the response cache, second pass is served from it
+    for name in ('cold', 'warm'):
+        started = time.perf_counter()
+        for product_id in targets:
+            assert http.get(f'/api/products/{product_id}/related').status_code == 200
+        report[f'request_{name}_ms'] = round((time.perf_counter() - started) / args.requests * 1000, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
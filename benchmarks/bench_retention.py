@@ -0,0 +1,89 @@
+"""Admin reads and archival of the contact table.
+
+    python benchmarks/bench_retention.py --rows 200000
+
+Seeds --rows contact messages spread over two years into a temporary SQLite
+database, then reports:
+  - the latency of one admin page (keyset on (created_at, id)) next to
+    loading the whole table, as a `query.all()` listing would;
+  - archival of everything older than a year: time, rows per second, size
+    of the gzipped archive and peak Python memory, which should stay flat
+    as --rows grows since rows are streamed in ARCHIVE_CHUNK_SIZE chunks.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--pages', type=int, default=50, help='admin pages to time')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from extensions import db
+    from models import Contact
+    import retention
+
+    app = create_app()
+    now = datetime.utcnow()
+    with app.app_context():
+        db.create_all()
+        step = timedelta(days=730) / args.rows
+        for start in range(0, args.rows, 10000):
+            db.session.execute(db.insert(Contact.__table__), [
+                {'name': f'n{i}', 'email': f'c{i}@example.com', 'message': 'Hello, I have a question about my order.',
+                 'created_at': now - step * i} for i in range(start, min(start + 10000, args.rows))])
+        db.session.commit()
+        admin = create_access_token(identity=1, additional_claims={'role': 'admin'})
+
+    http = app.test_client()
+    headers = {'Authorization': f'Bearer {admin}'}
+    report = {'rows': args.rows}
+
+    cursor, started = None, time.perf_counter()
+    for _ in range(args.pages):
+        response = http.get('/api/admin/contacts', query_string={'limit': 50, **({'cursor': cursor} if cursor else {})},
+                            headers=headers)
+        assert response.status_code == 200
+        cursor = response.headers.get('X-Next-Cursor')
+    report['keyset_page_ms'] = round((time.perf_counter() - started) / args.pages * 1000, 2)
+
+    with app.app_context():
+        started = time.perf_counter()
+        Contact.query.all()
+        report['load_all_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    with app.app_context():
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = retention.archive('contact', now - timedelta(days=365), os.path.join(tmpdir, 'archive'),
+                                   app.config['ARCHIVE_CHUNK_SIZE'])
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report['archive'] = {
+            'archived': result['archived'],
+            'seconds': round(elapsed, 2),
+            'rows_per_second': round(result['archived'] / elapsed),
+            'file_kb': round(os.path.getsize(result['path']) / 1024),
+            'peak_python_mb': round(peak / 1e6, 1),
+            'rows_left': Contact.query.count(),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Product search benchmark: FTS5 vs a LIKE scan.
+
+    python benchmarks/bench_search.py --products 100000 --queries 200
+
+Seeds a temporary SQLite database with synthetic products, then times
+search_products() against the equivalent LIKE '%term%' query. "Selective"
+queries use style words that match few products; "broad" queries use common
+words that match most of the catalog, where ranking every hit dominates.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = ('silk cotton linen denim leather wool red blue black white green summer winter '
+         'dress shirt jacket skirt trousers shoes boots scarf hat classic slim relaxed '
+         'vintage floral striped casual formal').split()
+CATEGORIES = ('dresses', 'tops', 'outerwear', 'shoes', 'accessories')
+SYLLABLES = 'ka lo mi ra ze tu vi no sa pe gri fla mon bel cor dan'.split()
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'search.db')}"
+
+    from app import create_app
+    from extensions import db
+    from models import Product
+    from search import search_products
+
+    app = create_app()
+
+    rng = random.Random(42)
+    styles = sorted({''.join(rng.choices(SYLLABLES, k=3)) for _ in range(8000)})
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        batch = []
+        for i in range(args.products):
+            batch.append({
+                'name': ' '.join([rng.choice(styles)] + rng.sample(WORDS, 2)),
+                'description': ' '.join(rng.choices(WORDS, k=20) + rng.choices(styles, k=2)),
+                'price': round(rng.uniform(5, 300), 2),
+                'image_url': f'https://example.com/{i}.jpg',
+                'stock': rng.randint(0, 100),
+                'category': rng.choice(CATEGORIES),
+            })
+            if len(batch) == 10_000:
+                db.session.execute(db.insert(Product.__table__), batch)
+                batch.clear()
+        if batch:
+            db.session.execute(db.insert(Product.__table__), batch)
+        db.session.commit()
+        seed_seconds = time.perf_counter() - start
+
+        selective = [rng.choice(styles)[:-1] for _ in range(args.queries)]
+        broad = [rng.choice(WORDS)[:-1] for _ in range(args.queries)]
+
+        def like(q):
+            query = Product.query
+            for term in q.split():
+                query = query.filter(db.or_(Product.name.like(f'%{term}%'),
+                                            Product.description.like(f'%{term}%')))
+            return query.limit(20).all()
+
+        report = {
+            'products': args.products,
+            'queries': args.queries,
+            'seed_seconds': round(seed_seconds, 2),
+            'selective_fts_ms': round(timed(lambda q: search_products(q, limit=20), selective), 3),
+            'selective_fts_category_ms': round(
+                timed(lambda q: search_products(q, category='shoes', limit=20), selective), 3),
+            'selective_like_ms': round(timed(like, selective), 3),
+            'broad_fts_ms': round(timed(lambda q: search_products(q, limit=20), broad), 3),
+            'broad_like_ms': round(timed(like, broad), 3),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Worker boot time: importing the app module, create_app() and the first request.
+
+    python benchmarks/bench_startup.py --runs 10 --budget-ms 1000
+
+Each run is a fresh interpreter, as a newly forked or autoscaled worker
+would be. Exits non-zero when the median time to a ready app (import plus
+create_app) exceeds --budget-ms, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+with app.app_context():
+    from extensions import db
+    db.create_all()
+app.test_client().get('/api/products')
+served = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'create_ms': (created - imported) * 1000,
+                  'first_request_ms': (served - created) * 1000}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=1000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(tmpdir, 'startup.db')}")
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env, check=True,
+                             capture_output=True, text=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    report = {key: {'median': round(statistics.median(s[key] for s in samples), 1),
+                    'max': round(max(s[key] for s in samples), 1)}
+              for key in samples[0]}
+    ready_ms = statistics.median(s['import_ms'] + s['create_ms'] for s in samples)
+    report['ready_ms'] = round(ready_ms, 1)
+    report['budget_ms'] = args.budget_ms
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if ready_ms > args.budget_ms else 0)
+
+
+if __name__ == '__main__':
+    main()
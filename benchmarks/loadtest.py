@@ -0,0 +1,379 @@
+"""Load test for every route in api_ns.
+
+    python benchmarks/loadtest.py --requests 200 --concurrency 8 --output results.json
+    python benchmarks/loadtest.py --baseline results.json --max-regression 0.25
+
+Seeds users, products and carts into a temporary SQLite database, then
+drives each route/method pair through the Flask test client from a fixed
+number of threads and reports p50/p95/p99 latency and requests/sec per
+endpoint as JSON. With --baseline the run fails (exit 1) if any endpoint's
+p95 regressed by more than --max-regression, and routes without a scenario
+are listed under "uncovered" so new endpoints are not silently skipped.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'bench-password'
+CATEGORIES = ('dresses', 'tops', 'outerwear', 'shoes', 'accessories')
+WORDS = 'silk cotton linen denim leather wool red blue black summer winter dress shirt jacket skirt boots'.split()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Dataset:
+    """Seeded ids and tokens the scenarios draw from."""
+
+    def __init__(self, args):
+        self.args = args
+        self.users = []            # (id, email, token) of shoppers with carts
+        self.cart_items = {}       # user id -> [cart line ids]
+        self.deletable_items = []  # (token, cart line id), one per DELETE request
+        self.checkout_tokens = []  # one shopper with a full cart per checkout request
+        self.checkout_ids = []     # (token, checkout id) filled in by the checkout scenario
+        self.job_ids = []          # filled in by the POST /api/admin/jobs scenario
+        self.products = 0
+        self.deletable_products = []
+        self.role_user_id = None
+        self.admin_headers = None
+        self._lock = threading.Lock()
+
+    def seed(self, app, db):
+        from flask_jwt_extended import create_access_token
+        from extensions import password_hasher
+        from models import Cart, Product, User
+        import facets
+
+        args = self.args
+        rng = random.Random(args.seed)
+        n = args.requests
+        hashed = password_hasher.hash(PASSWORD)
+
+        with app.app_context():
+            db.create_all()
+            products = Product.__table__
+            batch = [{
+                'name': ' '.join(rng.sample(WORDS, 3)),
+                'description': ' '.join(rng.choices(WORDS, k=15)),
+                'price': round(rng.uniform(5, 300), 2),
+                'image_url': f'https://example.com/{i}.jpg',
+                'stock': 1_000_000,
+                'category': rng.choice(CATEGORIES),
+            } for i in range(args.products + n)]
+            db.session.execute(db.insert(products), batch)
+            self.products = args.products
+            # products past the catalog are reserved for the DELETE scenario
+            self.deletable_products = list(range(args.products + 1, args.products + n + 1))
+            facets.rebuild()
+
+            user_rows = [{'username': f'user{i}', 'email': f'user{i}@example.com', 'password': hashed,
+                          'is_admin': False} for i in range(args.users + n + 1)]
+            user_rows.append({'username': 'admin', 'email': 'admin@example.com', 'password': hashed,
+                              'is_admin': True})
+            db.session.execute(db.insert(User.__table__), user_rows)
+            db.session.commit()
+
+            ids = [uid for uid, in db.session.query(User.id).order_by(User.id)]
+            shoppers, checkout_users = ids[:args.users], ids[args.users:args.users + n]
+            self.role_user_id, admin_id = ids[args.users + n], ids[-1]
+
+            cart_rows = []
+            for uid in shoppers:
+                for pid in rng.sample(range(1, args.products + 1), args.cart_lines):
+                    cart_rows.append({'user_id': uid, 'product_id': pid, 'quantity': rng.randint(1, 3)})
+            for uid in checkout_users:
+                for pid in rng.sample(range(1, args.products + 1), 3):
+                    cart_rows.append({'user_id': uid, 'product_id': pid, 'quantity': 1})
+            db.session.execute(db.insert(Cart.__table__), cart_rows)
+            db.session.commit()
+
+            for cart_id, uid in db.session.query(Cart.id, Cart.user_id).order_by(Cart.id):
+                self.cart_items.setdefault(uid, []).append(cart_id)
+
+            def token(uid, role='user'):
+                return create_access_token(identity=uid, additional_claims={'role': role})
+
+            self.users = [(uid, f'user{i}@example.com', token(uid)) for i, uid in enumerate(shoppers)]
+            # the last cart line of each shopper is left for DELETE, the others for PUT
+            for uid, _, tok in self.users:
+                self.deletable_items.append((tok, self.cart_items[uid][-1]))
+            self.checkout_tokens = [token(uid) for uid in checkout_users]
+            self.admin_headers = {'Authorization': f'Bearer {token(admin_id, "admin")}'}
+
+    def user(self, i):
+        return self.users[i % len(self.users)]
+
+    def headers(self, i):
+        return {'Authorization': f'Bearer {self.user(i)[2]}'}
+
+
+def _auth(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def build_scenarios(ds):
+    """(method, rule) -> fn(i) returning (path, request kwargs, expected statuses).
+
+    Ordered: read-only first, destructive last, since later scenarios
+    consume what earlier ones leave behind (carts, products).
+    """
+    n_products = ds.products
+    rng = random.Random(ds.args.seed)
+    sorts = ('newest', 'price', '-price', 'name')
+
+    def import_body(i):
+        rows = [json.dumps({'name': f'import {i}-{j}', 'description': 'bulk', 'price': 10.0,
+                            'image_url': 'https://example.com/x.jpg', 'stock': 5,
+                            'category': CATEGORIES[j % len(CATEGORIES)]}) for j in range(100)]
+        return '\n'.join(rows)
+
+    def cart_put(i):
+        uid, _, tok = ds.user(i)
+        item_id = ds.cart_items[uid][i % max(1, len(ds.cart_items[uid]) - 1)]
+        return f'/api/cart/{item_id}', {'json': {'quantity': 1 + i % 3}, 'headers': _auth(tok)}, {200}
+
+    def checkout(i):
+        return '/api/checkout', {'headers': _auth(ds.checkout_tokens[i])}, {201}
+
+    def confirm(i):
+        tok, checkout_id = ds.checkout_ids[i % len(ds.checkout_ids)]
+        # a checkout can only be confirmed once
+        return f'/api/checkout/{checkout_id}/confirm', {'headers': _auth(tok)}, {200, 404}
+
+    def cart_delete(i):
+        tok, item_id = ds.deletable_items[i % len(ds.deletable_items)]
+        return f'/api/cart/{item_id}', {'headers': _auth(tok)}, {200, 404}
+
+    return {
+        ('GET', '/api/products'): lambda i: (
+            '/api/products', {'query_string': {'sort': sorts[i % len(sorts)], 'limit': 50}}, {200}),
+        ('GET', '/api/products/facets'): lambda i: ('/api/products/facets', {}, {200}),
+        ('GET', '/api/products/search'): lambda i: (
+            '/api/products/search', {'query_string': {'q': rng.choice(WORDS)[:4]}}, {200}),
+        ('GET', '/api/products/changes'): lambda i: (
+            '/api/products/changes', {'query_string': {'limit': 500}}, {200}),
+        ('GET', '/api/products/<int:product_id>'): lambda i: (
+            f'/api/products/{i % n_products + 1}', {}, {200}),
+        ('GET', '/api/products/<int:product_id>/related'): lambda i: (
+            f'/api/products/{i % n_products + 1}/related', {}, {200}),
+        ('POST', '/api/login'): lambda i: (
+            '/api/login', {'json': {'email': ds.user(i)[1], 'password': PASSWORD}}, {200}),
+        ('GET', '/api/cart'): lambda i: ('/api/cart', {'headers': ds.headers(i)}, {200}),
+        ('GET', '/api/cart/summary'): lambda i: ('/api/cart/summary', {'headers': ds.headers(i)}, {200}),
+        ('GET', '/api/guest-cart'): lambda i: (
+            '/api/guest-cart', {'headers': {'X-Cart-Token': f'bench-{i % 50}'}}, {200}),
+        ('GET', '/api/admin/products'): lambda i: (
+            '/api/admin/products', {'query_string': {'limit': 50}, 'headers': ds.admin_headers}, {200}),
+        ('GET', '/api/admin/products/export'): lambda i: (
+            '/api/admin/products/export', {'headers': ds.admin_headers}, {200}),
+        ('GET', '/api/admin/cache'): lambda i: ('/api/admin/cache', {'headers': ds.admin_headers}, {200}),
+        ('GET', '/api/admin/jobs'): lambda i: (
+            '/api/admin/jobs', {'query_string': {'limit': 50}, 'headers': ds.admin_headers}, {200}),
+        ('GET', '/api/admin/contacts'): lambda i: (
+            '/api/admin/contacts', {'query_string': {'limit': 50}, 'headers': ds.admin_headers}, {200}),
+        ('GET', '/api/admin/contacts/export'): lambda i: (
+            '/api/admin/contacts/export', {'headers': ds.admin_headers}, {200}),
+        ('GET', '/api/admin/newsletter'): lambda i: (
+            '/api/admin/newsletter', {'query_string': {'limit': 50}, 'headers': ds.admin_headers}, {200}),
+        ('GET', '/api/admin/newsletter/export'): lambda i: (
+            '/api/admin/newsletter/export', {'headers': ds.admin_headers}, {200}),
+        ('POST', '/api/signup'): lambda i: (
+            '/api/signup', {'json': {'username': f's{i}', 'email': f'signup{i}@example.com',
+                                     'password': PASSWORD}}, {201}),
+        ('POST', '/api/newsletter'): lambda i: (
+            '/api/newsletter', {'json': {'email': f'news{i}@example.com'}}, {201, 202}),
+        ('POST', '/api/contact'): lambda i: (
+            '/api/contact', {'json': {'name': 'Bench', 'email': f'c{i}@example.com',
+                                      'message': 'Hello'}}, {201, 202}),
+        ('POST', '/api/cart'): lambda i: (
+            '/api/cart', {'json': {'product_id': i % n_products + 1, 'quantity': 1},
+                          'headers': ds.headers(i)}, {201}),
+        ('POST', '/api/cart/batch'): lambda i: (
+            '/api/cart/batch', {'json': {'operations': [
+                {'op': 'add', 'product_id': (i * 5 + j) % n_products + 1, 'quantity': 1} for j in range(5)]},
+                'headers': ds.headers(i)}, {200}),
+        ('POST', '/api/guest-cart'): lambda i: (
+            '/api/guest-cart', {'json': {'product_id': i % n_products + 1, 'quantity': 1},
+                                'headers': {'X-Cart-Token': f'bench-{i % 50}'}}, {201}),
+        ('PUT', '/api/cart/<int:item_id>'): cart_put,
+        ('POST', '/api/admin/products'): lambda i: (
+            '/api/admin/products', {'json': {'name': f'new {i}', 'description': 'd', 'price': 12.5,
+                                             'image_url': 'https://example.com/n.jpg', 'stock': 10,
+                                             'category': CATEGORIES[i % len(CATEGORIES)]},
+                                    'headers': ds.admin_headers}, {201}),
+        ('PUT', '/api/admin/products/<int:product_id>'): lambda i: (
+            f'/api/admin/products/{i % n_products + 1}',
+            {'json': {'price': 10 + i % 50}, 'headers': ds.admin_headers}, {200}),
+        ('POST', '/api/admin/products/import'): lambda i: (
+            '/api/admin/products/import',
+            {'data': import_body(i), 'headers': {**ds.admin_headers, 'Content-Type': 'application/x-ndjson'}},
+            {200}),
+        ('POST', '/api/admin/jobs'): lambda i: (
+            '/api/admin/jobs', {'json': {'kind': 'release_reservations'}, 'headers': ds.admin_headers}, {202}),
+        # after the POST scenario, which leaves the job ids behind
+        ('GET', '/api/admin/jobs/<int:job_id>'): lambda i: (
+            f'/api/admin/jobs/{ds.job_ids[i % len(ds.job_ids)]}', {'headers': ds.admin_headers}, {200}),
+        ('PUT', '/api/admin/users/<int:user_id>/role'): lambda i: (
+            f'/api/admin/users/{ds.role_user_id}/role',
+            {'json': {'is_admin': bool(i % 2)}, 'headers': ds.admin_headers}, {200}),
+        ('POST', '/api/checkout'): checkout,
+        ('POST', '/api/checkout/<string:checkout_id>/confirm'): confirm,
+        ('DELETE', '/api/cart/<int:item_id>'): cart_delete,
+        ('DELETE', '/api/guest-cart/<int:product_id>'): lambda i: (
+            f'/api/guest-cart/{i % n_products + 1}', {'headers': {'X-Cart-Token': f'bench-{i % 50}'}}, {200, 404}),
+        ('DELETE', '/api/admin/products/<int:product_id>'): lambda i: (
+            f'/api/admin/products/{ds.deletable_products[i % len(ds.deletable_products)]}',
+            {'headers': ds.admin_headers}, {200, 404}),
+    }
+
+
+def api_routes(app):
+    """Every (method, rule) served by the api namespace."""
+    routes = set()
+    for rule in app.url_map.iter_rules():
+        if not rule.endpoint.startswith('api_') or rule.endpoint.startswith('api_doc.'):
+            continue
+        for method in rule.methods - {'HEAD', 'OPTIONS'}:
+            routes.add((method, rule.rule))
+    return routes
+
+
+def run_scenario(app, ds, key, build, requests, concurrency):
+    local = threading.local()
+    latencies = []
+    statuses = Counter()
+    errors = 0
+    lock = threading.Lock()
+    method = key[0]
+
+    def one(i):
+        nonlocal errors
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        path, kwargs, expected = build(i)
+        start = time.perf_counter()
+        response = local.client.open(path, method=method, **kwargs)
+        elapsed = time.perf_counter() - start
+        if key == ('POST', '/api/checkout') and response.status_code == 201:
+            with ds._lock:
+                ds.checkout_ids.append((kwargs['headers']['Authorization'][7:], response.json['checkout_id']))
+        if key == ('POST', '/api/admin/jobs') and response.status_code == 202:
+            with ds._lock:
+                ds.job_ids.append(response.json['id'])
+        response.close()
+        with lock:
+            latencies.append(elapsed)
+            statuses[response.status_code] += 1
+            if response.status_code not in expected:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3)  # noqa: E731
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'rps': round(requests / wall, 2),
+        'mean_ms': ms(sum(latencies) / len(latencies)),
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+    }
+
+
+def compare(results, baseline, max_regression):
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous and current['p95_ms'] > previous['p95_ms'] * (1 + max_regression):
+            regressions.append({'endpoint': name, 'baseline_p95_ms': previous['p95_ms'],
+                                'p95_ms': current['p95_ms']})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--cart-lines', type=int, default=5, help='cart lines per seeded user')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--bcrypt-rounds', type=int, default=4)
+    parser.add_argument('--no-cache', action='store_true', help='disable the product catalog cache')
+    parser.add_argument('--only', help='glob over "METHOD /rule" to run a subset')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--baseline', help='previous JSON report to compare p95 latency against')
+    parser.add_argument('--max-regression', type=float, default=0.25)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='fashionstore-bench-')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ['BCRYPT_ROUNDS'] = str(args.bcrypt_rounds)
+    # room for every client thread, so login/signup measure hashing rather than load shedding
+    os.environ.setdefault('BCRYPT_MAX_PENDING', str(args.concurrency * 2))
+    # every request comes from one address, which the limiter would shed
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+
+    from app import create_app
+    from extensions import db, product_cache
+
+    app = create_app()
+
+    if args.no_cache:
+        product_cache.maxsize = 0
+
+    ds = Dataset(args)
+    ds.seed(app, db)
+    scenarios = build_scenarios(ds)
+    routes = api_routes(app)
+
+    results = {
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        'endpoints': {},
+        'uncovered': sorted(f'{m} {r}' for m, r in routes - set(scenarios)),
+    }
+    for key, build in scenarios.items():
+        name = f'{key[0]} {key[1]}'
+        if key not in routes or (args.only and not fnmatch.fnmatch(name, args.only)):
+            continue
+        results['endpoints'][name] = run_scenario(app, ds, key, build, args.requests, args.concurrency)
+        print(f'{name}: {results["endpoints"][name]["rps"]} req/s', file=sys.stderr)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['regressions'] = compare(results, json.load(f), args.max_regression)
+        exit_code = 1 if results['regressions'] else 0
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Checkout stress test on a single hot SKU.
+
+    python benchmarks/stress_checkout.py --buyers 300 --stock 100 --threads 32
+
+Every buyer has the same product in their cart and they all check out at
+once. Exits non-zero unless exactly `stock` checkouts succeed, the rest get
+409, stock ends at zero and the held reservations add up to the stock sold.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--buyers', type=int, default=300)
+    parser.add_argument('--stock', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir, 'stress.db')}"
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from extensions import db
+    from models import Cart, Product, Reservation, User
+
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        hot = Product(name='hot', description='d', price=10.0, image_url='x', stock=args.stock, category='hot')
+        users = [User(email=f'buyer{i}@example.com', password='x') for i in range(args.buyers)]
+        db.session.add(hot)
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all([Cart(user_id=u.id, product_id=hot.id, quantity=1) for u in users])
+        db.session.commit()
+        hot_id = hot.id
+        tokens = [create_access_token(identity=u.id) for u in users]
+
+    def checkout(token):
+        http = app.test_client()
+        start = time.perf_counter()
+        r = http.post('/api/checkout', headers={'Authorization': f'Bearer {token}'})
+        return r.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(checkout, tokens))
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        stock = db.session.get(Product, hot_id).stock
+        reserved = db.session.query(db.func.coalesce(db.func.sum(Reservation.quantity), 0)).scalar()
+
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(latency for _, latency in results)
+    report = {
+        'buyers': args.buyers,
+        'threads': args.threads,
+        'initial_stock': args.stock,
+        'statuses': dict(statuses),
+        'final_stock': stock,
+        'reserved': reserved,
+        'seconds': round(elapsed, 3),
+        'checkouts_per_sec': round(args.buyers / elapsed, 2),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+    print(json.dumps(report, indent=2))
+
+    expected_sold = min(args.stock, args.buyers)
+    ok = (statuses[201] == expected_sold
+          and statuses[409] == args.buyers - expected_sold
+          and stock == args.stock - expected_sold
+          and reserved == expected_sold)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+
+from extensions import db
+from engine import read_session
+from models import Product
+from serializers import encode_product
+
+
+PRODUCT_COLUMNS = ('name', 'description', 'price', 'image_url', 'stock', 'category')
+EXPORT_COLUMNS = ('id',) + PRODUCT_COLUMNS
+MAX_REPORTED_ERRORS = 100
+
+
+class RowError(ValueError):
+    pass
+
+
+class BodyError(ValueError):
+    """The rest of the body cannot be read, from `line` on."""
+
+    def __init__(self, message, line):
+        super().__init__(message)
+        self.line = line
+
+
+def decode_lines(stream):
+    for line_no, line in enumerate(stream, start=1):
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError:
+            raise BodyError('Body must be UTF-8', line_no) from None
+
+
+def parse_ndjson(lines):
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, RowError('Invalid JSON')
+            continue
+        if not isinstance(row, dict):
+            yield line_no, RowError('Expected a JSON object')
+            continue
+        yield line_no, row
+
+
+def parse_csv(lines):
+    # line 1 is the header
+    for line_no, row in enumerate(csv.DictReader(lines), start=2):
+        try:
+            if row.get('price') not in (None, ''):
+                row['price'] = float(row['price'])
+            if row.get('stock') not in (None, ''):
+                row['stock'] = int(row['stock'])
+        except ValueError:
+            yield line_no, RowError('price must be a number and stock an integer')
+            continue
+        yield line_no, row
+
+
+def import_products(rows, validator, chunk_size, categories, progress=None):
+    """Insert validated rows in transactions of `chunk_size` rows.
+
+    Rows that fail validation are skipped and reported; they never abort
+    the import. Only one chunk is held in memory at a time. The category of
+    every committed row is added to the caller's `categories` set, which
+    stays accurate if a later chunk raises. `progress`, if given, is called
+    with the rows inserted so far before each commit.
+
+    If the body turns out to be unreadable (BodyError), the rows before
+    that line are still committed and the report gets an 'aborted' entry
+    with the line and the reason.
+    """
+    inserted = 0
+    error_count = 0
+    errors = []
+    batch = []
+
+    def flush():
+        nonlocal inserted
+        db.session.execute(db.insert(Product.__table__), batch)
+        inserted += len(batch)
+        if progress is not None:
+            progress(inserted)
+        db.session.commit()
+        categories.update(row['category'] for row in batch)
+        batch.clear()
+
+    try:
+        for line_no, row in rows:
+            if not isinstance(row, RowError):
+                row = {column: row.get(column) for column in PRODUCT_COLUMNS}
+                error = next(validator.iter_errors(row), None)
+                if error is not None:
+                    row = RowError(error.message)
+                elif any(row[column] in (None, '') for column in PRODUCT_COLUMNS):
+                    row = RowError('All fields are required')
+                elif row['price'] < 0 or row['stock'] < 0:
+                    row = RowError('price and stock must not be negative')
+
+            if isinstance(row, RowError):
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line_no, 'message': str(row)})
+                continue
+
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                flush()
+        aborted = None
+    except BodyError as e:
+        aborted = {'line': e.line, 'message': str(e)}
+
+    if batch:
+        flush()
+    report = {'inserted': inserted, 'error_count': error_count, 'errors': errors}
+    if aborted:
+        report['aborted'] = aborted
+    return report
+
+
+def iter_products(chunk_size):
+    # yield_per streams rows from a server-side cursor in chunk_size batches
+    columns = [getattr(Product, column) for column in EXPORT_COLUMNS]
+    result = read_session().execute(
+        db.select(*columns).where(Product.deleted_at.is_(None)).order_by(Product.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for row in result:
+        yield row
+
+
+def export_ndjson(rows):
+    for row in rows:
+        yield encode_product(row) + b'\n'
+
+
+# Leading characters a spreadsheet reads as the start of a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_cell(value):
+    """Quote text a spreadsheet would evaluate (CSV injection) with a
+    leading apostrophe. Numbers are written as they are."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_csv(rows, columns=EXPORT_COLUMNS):
+    """CSV for people and spreadsheets: text cells that would be read as a
+    formula come out quoted, see csv_cell. NDJSON is the exact format."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow([csv_cell(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
@@ -0,0 +1,343 @@
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from extensions import db
+from dbutil import dialect_insert
+from models import Cart, GuestCartItem
+from workers import ProcessWorker
+
+logger = logging.getLogger(__name__)
+
+
+class StoredCart:
+    __slots__ = ('lines', 'changed', 'removed')
+
+    def __init__(self, lines):
+        self.lines = lines      # product_id -> [cart line id or None until saved, quantity]
+        self.changed = set()    # product_ids whose quantity must be upserted
+        self.removed = set()    # product_ids whose saved line must be deleted
+
+
+class CartStore(ProcessWorker):
+    """Write-back cache of shopping carts.
+
+    Active carts are kept in memory keyed by user_id, least recently used
+    first, and cart operations only touch memory. Dirty carts are written
+    to the cart table in one transaction every CART_STORE_FLUSH_INTERVAL
+    seconds, as soon as they are evicted, and at interpreter exit.
+
+    Guest carts are keyed by an opaque token, live only in memory and are
+    merged into the user's cart at login.
+
+    Carts are held per process, so write-back suits a single worker or
+    sticky sessions; with several workers each would keep its own copy.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.max_carts = None
+        self.max_guest_carts = None
+        self.flush_interval = None
+        self._carts = OrderedDict()
+        self._guests = OrderedDict()   # token -> {product_id: quantity}
+        self._dirty = set()            # user_ids with unsaved changes
+        self._evicted = {}             # dirty carts evicted before being saved
+        self._saving = {}              # evicted carts a flush is writing right now
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _start(self, app):
+        with self._lock:
+            self.max_carts = app.config['CART_STORE_MAX_CARTS']
+            self.max_guest_carts = app.config['CART_STORE_MAX_GUEST_CARTS']
+            self.flush_interval = app.config['CART_STORE_FLUSH_INTERVAL']
+            self._carts.clear()
+            self._guests.clear()
+            self._dirty.clear()
+            self._evicted.clear()
+            self._saving.clear()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='cart-store', daemon=True)
+            self._thread.start()
+
+    # User carts
+
+    def lines(self, user_id):
+        """[(line id or None, product_id, quantity)] in the order lines were added."""
+        cart = self._load(user_id)
+        with self._lock:
+            return [(line_id, product_id, quantity) for product_id, (line_id, quantity) in cart.lines.items()]
+
+    def add(self, user_id, product_id, quantity):
+        with self._resident(user_id) as cart:
+            line = cart.lines.setdefault(product_id, [None, 0])
+            line[1] += quantity
+            self._mark(user_id, cart, product_id)
+
+    def set_quantity(self, user_id, line_id, quantity):
+        """Returns False if the user has no such line."""
+        with self._resident(user_id) as cart:
+            product_id = self._find_line(cart, line_id)
+            if product_id is None:
+                return False
+            cart.lines[product_id][1] = quantity
+            self._mark(user_id, cart, product_id)
+            return True
+
+    def remove(self, user_id, line_id):
+        """Returns False if the user has no such line."""
+        with self._resident(user_id) as cart:
+            product_id = self._find_line(cart, line_id)
+            if product_id is None:
+                return False
+            del cart.lines[product_id]
+            cart.changed.discard(product_id)
+            cart.removed.add(product_id)
+            self._dirty.add(user_id)
+            return True
+
+    def product_for_line(self, user_id, line_id):
+        cart = self._load(user_id)
+        with self._lock:
+            return self._find_line(cart, line_id)
+
+    def ensure_ids(self, user_id):
+        """Save the cart now if it has lines that do not have a line id yet."""
+        cart = self._load(user_id)
+        with self._lock:
+            if all(line_id is not None for line_id, _ in cart.lines.values()):
+                return
+        self.flush([user_id])
+
+    def discard(self, user_id):
+        """Forget a cart the caller just rewrote in the database."""
+        with self._lock:
+            self._carts.pop(user_id, None)
+            self._evicted.pop(user_id, None)
+            self._dirty.discard(user_id)
+
+    # Guest carts
+
+    def guest_lines(self, token):
+        with self._lock:
+            lines = self._guests.get(token)
+            if lines is None:
+                return {}
+            self._guests.move_to_end(token)
+            return dict(lines)
+
+    def guest_add(self, token, product_id, quantity):
+        with self._lock:
+            lines = self._guests.setdefault(token, {})
+            self._guests.move_to_end(token)
+            lines[product_id] = lines.get(product_id, 0) + quantity
+            while len(self._guests) > self.max_guest_carts:
+                self._guests.popitem(last=False)
+
+    def guest_remove(self, token, product_id):
+        with self._lock:
+            return self._guests.get(token, {}).pop(product_id, None) is not None
+
+    def take_guest(self, token):
+        """Remove and return a guest cart, e.g. to merge it at login."""
+        with self._lock:
+            return self._guests.pop(token, {})
+
+    # Persistence
+
+    def pending(self):
+        with self._lock:
+            return len(self._dirty)
+
+    def flush(self, user_ids=None):
+        """Save dirty carts (all of them, or just user_ids) in one transaction."""
+        with self._flush_lock:
+            with self._lock:
+                targets = self._dirty if user_ids is None else self._dirty.intersection(user_ids)
+                # look every cart up before touching any, so a missing one
+                # cannot leave earlier carts marked clean but unsaved
+                carts = [(user_id, self._carts.get(user_id) or self._evicted[user_id]) for user_id in targets]
+                batch = []
+                for user_id, cart in carts:
+                    if self._evicted.pop(user_id, None) is not None:
+                        self._saving[user_id] = cart
+                    batch.append((user_id, cart, cart.changed, cart.removed))
+                    cart.changed, cart.removed = set(), set()
+                    self._dirty.discard(user_id)
+                upserts = [{'user_id': user_id, 'product_id': product_id, 'quantity': cart.lines[product_id][1]}
+                           for user_id, cart, changed, _ in batch for product_id in changed]
+                deletes = [{'b_user_id': user_id, 'b_product_id': product_id}
+                           for user_id, _, _, removed in batch for product_id in removed]
+            if not batch:
+                return 0
+
+            with self.app.app_context():
+                try:
+                    if deletes:
+                        table = Cart.__table__
+                        db.session.execute(db.delete(table).where(
+                            table.c.user_id == db.bindparam('b_user_id'),
+                            table.c.product_id == db.bindparam('b_product_id')
+                        ), deletes)
+                    if upserts:
+                        stmt = dialect_insert(Cart)
+                        db.session.execute(stmt.on_conflict_do_update(
+                            index_elements=['user_id', 'product_id'],
+                            set_={'quantity': stmt.excluded.quantity}
+                        ), upserts)
+                    ids = []
+                    if upserts:
+                        ids = db.session.query(Cart.user_id, Cart.product_id, Cart.id).filter(
+                            Cart.user_id.in_(list({row['user_id'] for row in upserts}))).all()
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    self._restore(batch)
+                    raise
+
+            with self._lock:
+                carts = {user_id: cart for user_id, cart, _, _ in batch}
+                for user_id in carts:
+                    self._saving.pop(user_id, None)
+                for user_id, product_id, line_id in ids:
+                    line = carts[user_id].lines.get(product_id)
+                    if line is not None:
+                        line[0] = line_id
+            return len(batch)
+
+    def _shutdown(self):
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def _load(self, user_id):
+        with self._lock:
+            cart = self._carts.get(user_id)
+            if cart is not None:
+                self._carts.move_to_end(user_id)
+                return cart
+            cart = self._evicted.pop(user_id, None) or self._saving.get(user_id)
+        if cart is None:
+            with self.app.app_context():
+                rows = db.session.query(Cart.id, Cart.product_id, Cart.quantity) \
+                    .filter(Cart.user_id == user_id).order_by(Cart.id).all()
+            cart = StoredCart({product_id: [line_id, quantity] for line_id, product_id, quantity in rows})
+        with self._lock:
+            # another request may have loaded it meanwhile; keep that copy
+            cart = self._carts.setdefault(user_id, cart)
+            self._carts.move_to_end(user_id)
+            while len(self._carts) > self.max_carts:
+                evicted_id, evicted = self._carts.popitem(last=False)
+                if evicted_id in self._dirty:
+                    self._evicted[evicted_id] = evicted
+                    self._wakeup.notify()
+            return cart
+
+    @contextmanager
+    def _resident(self, user_id):
+        """The user's cart, with the lock held and the cart in _carts, so no
+        other request can evict it between loading and changing it."""
+        while True:
+            cart = self._load(user_id)
+            self._lock.acquire()
+            if self._carts.get(user_id) is cart:
+                break
+            # evicted (and possibly reloaded) since _load returned; try again
+            self._lock.release()
+        try:
+            yield cart
+        finally:
+            self._lock.release()
+
+    def _mark(self, user_id, cart, product_id):
+        cart.changed.add(product_id)
+        cart.removed.discard(product_id)
+        self._dirty.add(user_id)
+
+    @staticmethod
+    def _find_line(cart, line_id):
+        for product_id, (saved_id, _) in cart.lines.items():
+            if saved_id == line_id:
+                return product_id
+        return None
+
+    def _restore(self, batch):
+        with self._lock:
+            for user_id, cart, changed, removed in batch:
+                cart.changed |= {p for p in changed if p in cart.lines}
+                cart.removed |= {p for p in removed if p not in cart.lines}
+                self._dirty.add(user_id)
+                self._saving.pop(user_id, None)
+                if user_id not in self._carts:
+                    self._evicted[user_id] = cart
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._wakeup:
+                if not self._evicted:
+                    self._wakeup.wait(self.flush_interval)
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Cart store flush failed')
+
+
+class GuestCartTable:
+    """Guest carts in the guest_cart table, for when the write-back store is
+    off: any worker can serve any guest. Same interface as the store's
+    guest_* methods; runs in the caller's session and commits writes.
+
+    A cart untouched for GUEST_CART_TTL_DAYS counts as gone and is reset by
+    the next add; the cart_cleanup job deletes the rows.
+    """
+
+    @staticmethod
+    def cutoff():
+        return datetime.utcnow() - timedelta(days=current_app.config['GUEST_CART_TTL_DAYS'])
+
+    def guest_lines(self, token):
+        rows = db.session.query(GuestCartItem.product_id, GuestCartItem.quantity) \
+            .filter(GuestCartItem.token == token, GuestCartItem.updated_at >= self.cutoff()) \
+            .order_by(GuestCartItem.updated_at, GuestCartItem.product_id).all()
+        return dict(rows)
+
+    def guest_add(self, token, product_id, quantity):
+        now, cutoff = datetime.utcnow(), self.cutoff()
+        stmt = dialect_insert(GuestCartItem).values(token=token, product_id=product_id,
+                                                    quantity=quantity, updated_at=now)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['token', 'product_id'],
+            set_={'quantity': db.case((GuestCartItem.updated_at < cutoff, stmt.excluded.quantity),
+                                      else_=GuestCartItem.quantity + stmt.excluded.quantity),
+                  'updated_at': now}
+        ))
+        # the cart expires as a whole, so adding to it keeps every line
+        db.session.execute(db.update(GuestCartItem).where(
+            GuestCartItem.token == token, GuestCartItem.updated_at >= cutoff).values(updated_at=now))
+        db.session.commit()
+
+    def guest_remove(self, token, product_id):
+        removed = db.session.execute(db.delete(GuestCartItem).where(
+            GuestCartItem.token == token, GuestCartItem.product_id == product_id)).rowcount
+        db.session.commit()
+        return removed > 0
+
+    def take_guest(self, token):
+        """Remove and return a guest cart; the delete commits with the
+        caller's merge."""
+        lines = self.guest_lines(token)
+        db.session.execute(db.delete(GuestCartItem).where(GuestCartItem.token == token))
+        return lines
@@ -7,7 +7,111 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key')
-    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(basedir, 'instance', 'fashion_store.db')}"
+    SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///fashionstore.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-jwt-secret-key')
-    JWT_AUTH_HEADER_PREFIX = 'Bearer'  
\ No newline at end of file
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key')
+    JWT_AUTH_HEADER_PREFIX = 'Bearer'
+    # verified tokens -> claims, so repeat requests skip the decode and HMAC; 0 disables
+    JWT_VERIFIED_CACHE_SIZE = int(os.getenv('JWT_VERIFIED_CACHE_SIZE', 10000))
+    JWT_VERIFIED_CACHE_TTL = 300
+    DEBUG = os.getenv('FLASK_DEBUG', '1') == '1'
+    CORS_ORIGINS = ['http://localhost:5173']
+    CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'ETag', 'X-Cart-Token']
+
+    # Database engine
+    # Optional read-only connection for catalog reads, e.g. a Postgres replica.
+    # In tests the primary SQLite file opened read-only stands in for it:
+    # sqlite:///file:/path/fashionstore.db?mode=ro&uri=true
+    READ_DATABASE_URI = os.getenv('READ_DATABASE_URI')
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -64000,  # KiB
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    }
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+
+    # ASGI mode (uvicorn asgi:application): threads running the Flask routes
+    ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 32))
+
+    # Product catalog cache
+    PRODUCT_CACHE_SIZE = 1024
+    PRODUCT_CACHE_TTL = 60
+    PRODUCT_FRAGMENT_CACHE_SIZE = 50000  # encoded products reused across list pages
+    # /products/changes leaves out changes newer than this many seconds, so a
+    # write still in flight when a cursor is handed out cannot land behind it
+    PRODUCT_CHANGES_LAG = 5
+
+    # Password hashing
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    BCRYPT_WORKERS = int(os.environ['BCRYPT_WORKERS']) if os.getenv('BCRYPT_WORKERS') else None  # None = one per CPU, 0 = inline
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', 0)) or None  # None = 4 per worker
+
+    # Rate limiting of login, signup, newsletter and contact.
+    # memory:// keeps buckets per process; redis://host:6379/0 shares them.
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_STORAGE_URI = os.getenv('RATE_LIMIT_STORAGE_URI', 'memory://')
+    RATE_LIMIT_MAX_KEYS = 100000
+    RATE_LIMITS = {
+        # scope: {key: (requests per minute, burst)}
+        'login': {'ip': (60, 20), 'email': (10, 5)},
+        'signup': {'ip': (10, 5), 'email': (5, 3)},
+        'newsletter': {'ip': (20, 10), 'email': (5, 3)},
+        'contact': {'ip': (10, 5), 'email': (5, 3)},
+    }
+
+    # Cart
+    CART_BATCH_MAX_OPERATIONS = 100
+    # Write-back cart store: carts are kept in memory and saved in batches.
+    # Carts are held per process, so only for a single worker or sticky sessions.
+    CART_STORE_ENABLED = os.getenv('CART_STORE_ENABLED', '0') == '1'
+    CART_STORE_MAX_CARTS = 10000
+    CART_STORE_MAX_GUEST_CARTS = 10000
+    CART_STORE_FLUSH_INTERVAL = 5.0
+    # Guest carts untouched for this long are treated as gone (table-backed
+    # carts, i.e. with the store off; the store keeps CART_STORE_MAX_GUEST_CARTS)
+    GUEST_CART_TTL_DAYS = 30
+
+    # Checkout
+    RESERVATION_TTL = 900
+    RESERVATION_SWEEP_INTERVAL = 30
+
+    # "Frequently added together" products, rebuilt by `flask build-related`
+    RELATED_TOP_K = 20
+    RELATED_MIN_SUPPORT = 2  # carts a pair must share
+    RELATED_MAX_CART_SIZE = 50  # larger carts are skipped
+
+    # Bulk import/export
+    PRODUCT_IMPORT_CHUNK_SIZE = 1000
+
+    # Background jobs (admin bulk work and maintenance), run by a thread pool
+    # in each worker; state is kept in the jobs table
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_BATCH_SIZE = 1000  # rows per transaction
+    JOB_STALE_AFTER = 3600  # running jobs older than this are failed at startup
+    JOB_SPOOL_DIR = os.getenv('JOB_SPOOL_DIR')  # request bodies of async imports; None = system temp dir
+
+    # Newsletter/contact write-behind
+    WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND_ENABLED', '0') == '1'
+    WRITE_BEHIND_FLUSH_SIZE = 200
+    WRITE_BEHIND_FLUSH_INTERVAL = 1.0
+    WRITE_BEHIND_MAX_PENDING = 10000
+
+    # Retention: `flask archive` moves contact and newsletter rows older than
+    # this many days into gzipped NDJSON files in ARCHIVE_DIR. None keeps them;
+    # newsletter rows are live subscriptions, so they are kept unless configured.
+    RETENTION_DAYS = {
+        'contact': int(os.getenv('CONTACT_RETENTION_DAYS', 365)),
+        'newsletter': int(os.environ['NEWSLETTER_RETENTION_DAYS']) if os.getenv('NEWSLETTER_RETENTION_DAYS') else None,
+    }
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', os.path.join(basedir, 'archive'))
+    ARCHIVE_CHUNK_SIZE = 1000
+
+    # Instrumentation
+    SLOW_QUERY_MS = 100
+    N_PLUS_ONE_THRESHOLD = 10
@@ -1,6 +1,6 @@
 from app import create_app
+from extensions import password_hasher
 from models import db, User
-import bcrypt
 
 app = create_app()
 with app.app_context():
@@ -9,8 +9,8 @@ with app.app_context():
     email = "admin@exampe.com"
     password = "admin1234"
     if not User.query.filter_by(email=email).first(): 
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        admin = User(username="admin", email=email, password=hashed_password.decode('utf-8'), is_admin=True)
+        hashed_password = password_hasher.hash(password)
+        admin = User(username="admin", email=email, password=hashed_password, is_admin=True)
         db.session.add(admin)
         db.session.commit()
         print("Admin user created successfully")
@@ -0,0 +1,18 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db
+
+
+_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+def dialect_insert(model):
+    """Return an INSERT for `model` that supports on_conflict_do_update()."""
+    dialect = db.session.get_bind().dialect.name
+    try:
+        return _INSERTS[dialect](model)
+    except KeyError:
+        raise NotImplementedError(f'Upserts are not supported on {dialect}')
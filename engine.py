@@ -0,0 +1,99 @@
+from flask import current_app, g
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+
+def engine_options(uri, config):
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        # pragmas are applied per connection, see apply_sqlite_pragmas
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+
+def configure_engines(app):
+    """Derive engine options and the optional read bind from the config.
+
+    Must run before db.init_app(app); init_engines(app) runs after it.
+    """
+    config = app.config
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(config['SQLALCHEMY_DATABASE_URI'], config)
+    if config.get('READ_DATABASE_URI'):
+        config['SQLALCHEMY_BINDS'] = {
+            'read': {'url': config['READ_DATABASE_URI'],
+                     **engine_options(config['READ_DATABASE_URI'], config)},
+        }
+
+    @app.teardown_appcontext
+    def _close_read_session(exc):
+        session = g.pop('read_session', None)
+        if session is not None:
+            session.close()
+
+
+def init_engines(app):
+    """Set up the engines db.init_app(app) created for this app."""
+    with app.app_context():
+        for engine in app.extensions['sqlalchemy'].engines.values():
+            apply_sqlite_pragmas(engine, app.config['SQLITE_PRAGMAS'])
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run `pragmas` on every new connection of a SQLite engine. The
+    listener is bound to this engine only, so apps in one process never
+    apply each other's pragmas."""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            try:
+                cursor.execute(f'PRAGMA {name} = {value}')
+            except Exception:
+                # e.g. journal_mode on a read-only connection
+                pass
+        cursor.close()
+
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def create_async_sessionmaker(app, bind_key=None):
+    """Async sessions on the same database as `db.engines[bind_key]`.
+
+    Needs aiosqlite (or asyncpg for Postgres). The URL is taken from the
+    sync engine so relative SQLite paths resolve to the same file.
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    with app.app_context():
+        db = app.extensions['sqlalchemy']
+        url = db.engines[bind_key].url
+    url = url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+    config = app.config
+    async_engine = create_async_engine(url, **engine_options(url, config))
+    apply_sqlite_pragmas(async_engine.sync_engine, config['SQLITE_PRAGMAS'])
+    return async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def read_session():
+    """Session for read-only endpoints: the read bind when one is configured,
+    the primary session otherwise."""
+    db = current_app.extensions['sqlalchemy']
+    if 'read' not in db.engines:
+        return db.session
+    if 'read_session' not in g:
+        g.read_session = Session(bind=db.engines['read'])
+    return g.read_session
@@ -0,0 +1,28 @@
+from flask_cors import CORS
+from flask_sqlalchemy import SQLAlchemy
+
+from cache import TTLCache
+from hashing import PasswordHasher
+from metrics import metrics
+from ratelimit import RateLimiter
+from tokencache import CachingJWTManager
+
+# Created unbound so models and routes can import them; create_app()
+# configures them from the app config.
+db = SQLAlchemy()
+jwt = CachingJWTManager()
+cors = CORS()
+product_cache = TTLCache()
+product_fragment_cache = TTLCache()
+password_hasher = PasswordHasher()
+rate_limiter = RateLimiter()
+
+metrics.register_collector(lambda: [
+    ('product_cache_hits_total', 'counter', 'Product cache hits', product_cache.hits),
+    ('product_cache_misses_total', 'counter', 'Product cache misses', product_cache.misses),
+    ('product_fragment_cache_hits_total', 'counter', 'Product fragment cache hits', product_fragment_cache.hits),
+    ('product_fragment_cache_misses_total', 'counter', 'Product fragment cache misses',
+     product_fragment_cache.misses),
+    ('jwt_verified_cache_hits_total', 'counter', 'Verified-token cache hits', jwt.token_cache.hits),
+    ('jwt_verified_cache_misses_total', 'counter', 'Verified-token cache misses', jwt.token_cache.misses),
+])
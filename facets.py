@@ -0,0 +1,79 @@
+from extensions import db
+from dbutil import dialect_insert
+from engine import read_session
+from models import CategoryStats, Product
+
+
+# category_stats holds one row per category so facet reads cost
+# O(categories). Writers call these inside their own transaction, after the
+# product change has been flushed.
+
+def product_added(category, price):
+    stmt = dialect_insert(CategoryStats).values(
+        category=category, product_count=1, min_price=price, max_price=price
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['category'],
+        set_={
+            'product_count': CategoryStats.product_count + 1,
+            'min_price': db.case((stmt.excluded.min_price < CategoryStats.min_price, stmt.excluded.min_price),
+                                 else_=CategoryStats.min_price),
+            'max_price': db.case((stmt.excluded.max_price > CategoryStats.max_price, stmt.excluded.max_price),
+                                 else_=CategoryStats.max_price),
+        }
+    )
+    db.session.execute(stmt)
+
+
+def product_removed(category, price):
+    stats = db.session.get(CategoryStats, category)
+    if stats is None:
+        return
+    if stats.product_count <= 1:
+        db.session.delete(stats)
+        return
+    stats.product_count -= 1
+    # a bound moved only if the removed product sat on it; the
+    # (category, price) index makes the recount two index probes
+    if price <= stats.min_price or price >= stats.max_price:
+        stats.min_price, stats.max_price = db.session.query(
+            db.func.min(Product.price), db.func.max(Product.price)
+        ).filter(Product.category == category, Product.deleted_at.is_(None)).one()
+
+
+def product_changed(old_category, old_price, new_category, new_price):
+    if old_category == new_category and old_price == new_price:
+        return
+    product_removed(old_category, old_price)
+    product_added(new_category, new_price)
+
+
+def rebuild(categories=None):
+    query = db.session.query(
+        Product.category, db.func.count(Product.id), db.func.min(Product.price), db.func.max(Product.price)
+    ).filter(Product.deleted_at.is_(None)).group_by(Product.category)
+    delete = db.delete(CategoryStats)
+    if categories is not None:
+        query = query.filter(Product.category.in_(categories))
+        delete = delete.where(CategoryStats.category.in_(categories))
+    rows = query.all()
+    db.session.execute(delete)
+    if rows:
+        db.session.execute(db.insert(CategoryStats.__table__), [
+            {'category': category, 'product_count': count, 'min_price': min_price, 'max_price': max_price}
+            for category, count, min_price, max_price in rows
+        ])
+
+
+def facets():
+    rows = read_session().query(CategoryStats).order_by(CategoryStats.category).all()
+    return {
+        'categories': [{
+            'category': row.category,
+            'count': row.product_count,
+            'min_price': row.min_price,
+            'max_price': row.max_price
+        } for row in rows],
+        'min_price': min((row.min_price for row in rows), default=None),
+        'max_price': max((row.max_price for row in rows), default=None),
+    }
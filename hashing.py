@@ -0,0 +1,84 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+def hash_rounds(hashed):
+    # bcrypt hashes look like $2b$12$<salt+digest>
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool so request threads never burn
+    the CPU themselves.
+
+    At most `max_pending` operations may be queued or running; beyond that
+    `HasherBusy` is raised immediately so the caller can shed load. With
+    `workers=0` hashing runs inline, which is what scripts and tests want.
+    """
+
+    def __init__(self, rounds=12, workers=None, max_pending=None, timeout=30):
+        self.timeout = timeout
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self.configure(rounds, workers, max_pending)
+
+    def configure(self, rounds, workers=None, max_pending=None):
+        self.shutdown()
+        self.rounds = rounds
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending or max(self.workers, 1) * 4
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def hash(self, password):
+        hashed = self._run(_hashpw, password.encode('utf-8'), self.rounds)
+        return hashed.decode('utf-8')
+
+    def check(self, password, hashed):
+        return self._run(_checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def _executor(self):
+        # A pool inherited across fork() is unusable, so each worker process
+        # of a pre-fork server lazily builds its own.
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Password hashing pool is saturated')
+        try:
+            if self.workers == 0:
+                return fn(*args)
+            return self._executor().submit(fn, *args).result(timeout=self.timeout)
+        finally:
+            self._slots.release()
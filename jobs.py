@@ -0,0 +1,93 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from extensions import db
+from models import Job
+from workers import ProcessWorker
+
+logger = logging.getLogger(__name__)
+
+
+class JobRunner(ProcessWorker):
+    """In-process queue for admin and maintenance work that should not hold
+    a request open.
+
+    Every job is a row in the jobs table, so its state outlives the request
+    and any worker can report it. A pool of JOB_WORKERS threads runs the
+    jobs; each one claims its row with a conditional UPDATE first, so a job
+    runs once even when several processes pick up the same queued rows.
+    Handlers get the job's params and a `progress(processed)` callback, do
+    their own batching and commit as they go.
+
+    A starting pool takes over jobs left queued by a process that exited,
+    and fails jobs that have been running for longer than JOB_STALE_AFTER
+    seconds.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.handlers = {}
+        self._executor = None
+
+    def handler(self, kind):
+        def decorator(fn):
+            self.handlers[kind] = fn
+            return fn
+        return decorator
+
+    def _start(self, app):
+        self._executor = ThreadPoolExecutor(app.config['JOB_WORKERS'], thread_name_prefix='job')
+        for job_id in self._recover(app.config['JOB_STALE_AFTER']):
+            self._executor.submit(self._run, job_id)
+
+    def submit(self, kind, params=None, user_id=None):
+        """Queue a job and return it. The row is committed before a worker
+        can look for it."""
+        if kind not in self.handlers:
+            raise ValueError(f'Unknown job kind: {kind}')
+        job = Job(kind=kind, params=params or {}, created_by=user_id, status='queued')
+        db.session.add(job)
+        db.session.commit()
+        self._executor.submit(self._run, job.id)
+        return job
+
+    def _shutdown(self):
+        # jobs that have not started stay queued for the next runner
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+
+    def _recover(self, stale_after):
+        with self.app.app_context():
+            db.session.execute(
+                db.update(Job)
+                .where(Job.status == 'running', Job.started_at < datetime.utcnow() - timedelta(seconds=stale_after))
+                .values(status='failed', error='Interrupted', finished_at=datetime.utcnow())
+            )
+            db.session.commit()
+            return [job_id for job_id, in db.session.query(Job.id)
+                    .filter(Job.status == 'queued').order_by(Job.created_at, Job.id)]
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            claimed = db.session.execute(
+                db.update(Job).where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', started_at=datetime.utcnow())
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                return
+            kind, params = db.session.query(Job.kind, Job.params).filter(Job.id == job_id).one()
+
+            def progress(processed):
+                # rides along with the handler's next commit
+                db.session.execute(db.update(Job).where(Job.id == job_id).values(processed=processed))
+
+            try:
+                values = {'status': 'succeeded', 'result': self.handlers[kind](params, progress)}
+            except Exception as e:
+                db.session.rollback()
+                logger.exception('Job %s (%s) failed', job_id, kind)
+                values = {'status': 'failed', 'error': str(e) or type(e).__name__}
+            db.session.execute(db.update(Job).where(Job.id == job_id).values(finished_at=datetime.utcnow(), **values))
+            db.session.commit()
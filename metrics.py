@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('slow_query')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """Request latency, per-request SQL usage and slow/N+1 query counters,
+    rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self._queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self._query_seconds = defaultdict(float)
+        self._requests = Counter()
+        self._n_plus_one = Counter()
+        self._slow_queries = 0
+        self._collectors = []
+
+    def observe_request(self, endpoint, method, status, seconds, queries, query_seconds):
+        with self._lock:
+            self._latency[endpoint, method].observe(seconds)
+            self._queries[endpoint, method].observe(queries)
+            self._query_seconds[endpoint, method] += query_seconds
+            self._requests[endpoint, method, status] += 1
+
+    def n_plus_one(self, endpoint, method):
+        with self._lock:
+            self._n_plus_one[endpoint, method] += 1
+
+    def slow_query(self):
+        with self._lock:
+            self._slow_queries += 1
+
+    def register_collector(self, collector):
+        """`collector()` returns extra (name, type, help, value) samples."""
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            self._render_histograms(lines, 'http_request_duration_seconds',
+                                    'Request latency by endpoint and method', self._latency)
+            self._render_histograms(lines, 'db_queries_per_request',
+                                    'SQL statements executed per request', self._queries)
+            lines += ['# HELP db_query_seconds_total Time spent in SQL by endpoint and method',
+                      '# TYPE db_query_seconds_total counter']
+            for (endpoint, method), seconds in sorted(self._query_seconds.items()):
+                lines.append(f'db_query_seconds_total{_labels(endpoint=endpoint, method=method)} {seconds}')
+            lines += ['# HELP http_requests_total Requests by endpoint, method and status',
+                      '# TYPE http_requests_total counter']
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+            lines += ['# HELP db_n_plus_one_suspected_total Requests that repeated one statement past the threshold',
+                      '# TYPE db_n_plus_one_suspected_total counter']
+            for (endpoint, method), count in sorted(self._n_plus_one.items()):
+                lines.append(f'db_n_plus_one_suspected_total{_labels(endpoint=endpoint, method=method)} {count}')
+            lines += ['# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS',
+                      '# TYPE db_slow_queries_total counter',
+                      f'db_slow_queries_total {self._slow_queries}']
+        for collector in self._collectors:
+            for name, metric_type, help_text, value in collector():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, histograms):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (endpoint, method), hist in sorted(histograms.items()):
+            for bound, count in zip(hist.buckets, hist.counts):
+                lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le=bound)} {count}')
+            lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le="+Inf")} {hist.count}')
+            lines.append(f'{name}_sum{_labels(endpoint=endpoint, method=method)} {hist.sum}')
+            lines.append(f'{name}_count{_labels(endpoint=endpoint, method=method)} {hist.count}')
+
+
+metrics = MetricsRegistry()
+
+
+def instrument_engine(engine, app):
+    """Time every statement `engine` runs and count it against the current
+    request. Listeners go on the app's own engines, not the Engine class,
+    so each app in a process counts its queries once, with its thresholds."""
+    slow_query_seconds = app.config['SLOW_QUERY_MS'] / 1000
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        if elapsed >= slow_query_seconds:
+            metrics.slow_query()
+            slow_query_logger.warning('%.1fms %s', elapsed * 1000, statement[:500])
+        if has_request_context() and 'metrics_start' in g:
+            g.metrics_queries += 1
+            g.metrics_query_seconds += elapsed
+            g.metrics_statements[statement] += 1
+
+
+def init_metrics(app):
+    n_plus_one_threshold = app.config['N_PLUS_ONE_THRESHOLD']
+    with app.app_context():
+        for engine in app.extensions['sqlalchemy'].engines.values():
+            instrument_engine(engine, app)
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_query_seconds = 0.0
+        g.metrics_statements = Counter()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        if 'metrics_start' not in g:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe_request(endpoint, request.method, response.status_code,
+                                time.perf_counter() - g.metrics_start,
+                                g.metrics_queries, g.metrics_query_seconds)
+        if g.metrics_statements:
+            statement, count = g.metrics_statements.most_common(1)[0]
+            if count >= n_plus_one_threshold:
+                metrics.n_plus_one(endpoint, request.method)
+                logger.warning('Possible N+1 in %s %s: statement ran %d times: %s',
+                               request.method, request.path, count, statement[:200])
+        return response
+
+    def metrics_view():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
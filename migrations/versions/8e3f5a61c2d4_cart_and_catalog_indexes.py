@@ -0,0 +1,54 @@
+"""cart and catalog indexes, role change tracking
+
+Revision ID: 8e3f5a61c2d4
+Revises: 4c1d2e7a9b30
+Create Date: 2026-10-17 10:02:17.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3f5a61c2d4'
+down_revision = '4c1d2e7a9b30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Merge duplicate cart lines left behind by the old read-then-write add
+    # path, otherwise the unique index cannot be built.
+    op.execute("""
+        UPDATE cart SET quantity = (
+            SELECT SUM(dup.quantity) FROM cart AS dup
+            WHERE dup.user_id = cart.user_id AND dup.product_id = cart.product_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart GROUP BY user_id, product_id HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM cart WHERE id NOT IN (
+            SELECT MIN(id) FROM cart GROUP BY user_id, product_id
+        )
+    """)
+    op.create_index('uq_cart_user_product', 'cart', ['user_id', 'product_id'], unique=True)
+
+    op.create_index(op.f('ix_products_category'), 'products', ['category'], unique=False)
+    op.create_index(op.f('ix_products_name'), 'products', ['name'], unique=False)
+    op.create_index(op.f('ix_products_price'), 'products', ['price'], unique=False)
+
+    op.add_column('users', sa.Column('role_changed_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_users_role_changed_at'), 'users', ['role_changed_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_users_role_changed_at'), table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('role_changed_at')
+
+    op.drop_index(op.f('ix_products_price'), table_name='products')
+    op.drop_index(op.f('ix_products_name'), table_name='products')
+    op.drop_index(op.f('ix_products_category'), table_name='products')
+    op.drop_index('uq_cart_user_product', table_name='cart')
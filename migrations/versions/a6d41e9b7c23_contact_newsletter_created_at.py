@@ -0,0 +1,35 @@
+"""created_at indexes for contact and newsletter
+
+Revision ID: a6d41e9b7c23
+Revises: f3a9c27d8b15
+Create Date: 2026-10-17 21:05:37.804119
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d41e9b7c23'
+down_revision = 'f3a9c27d8b15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keyset pages and the retention cutoff compare on created_at, which
+    # would skip rows where it was never set. A bound datetime, so the value
+    # is stored in the format SQLAlchemy compares against.
+    now = datetime.utcnow()
+    for name in ('contact', 'newsletter'):
+        table = sa.table(name, sa.column('created_at', sa.DateTime()))
+        op.execute(table.update().where(table.c.created_at.is_(None)).values(created_at=now))
+    op.create_index('ix_contact_created_at_id', 'contact', ['created_at', 'id'], unique=False)
+    op.create_index('ix_newsletter_created_at_id', 'newsletter', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_newsletter_created_at_id', table_name='newsletter')
+    op.drop_index('ix_contact_created_at_id', table_name='contact')
@@ -0,0 +1,33 @@
+"""guest carts
+
+Revision ID: b3f6e02a9d71
+Revises: d4e7a2c91f58
+Create Date: 2026-10-18 04:12:47.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f6e02a9d71'
+down_revision = 'd4e7a2c91f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('guest_cart',
+    sa.Column('token', sa.String(length=64), nullable=False),
+    sa.Column('product_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('token', 'product_id')
+    )
+    op.create_index('ix_guest_cart_updated_at', 'guest_cart', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_guest_cart_updated_at', table_name='guest_cart')
+    op.drop_table('guest_cart')
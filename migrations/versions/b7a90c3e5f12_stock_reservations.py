@@ -0,0 +1,40 @@
+"""stock reservations
+
+Revision ID: b7a90c3e5f12
+Revises: 8e3f5a61c2d4
+Create Date: 2026-10-17 11:26:03.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7a90c3e5f12'
+down_revision = '8e3f5a61c2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('checkout_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reservations_checkout_id'), 'reservations', ['checkout_id'], unique=False)
+    op.create_index('ix_reservations_status_expires_at', 'reservations', ['status', 'expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reservations_status_expires_at', table_name='reservations')
+    op.drop_index(op.f('ix_reservations_checkout_id'), table_name='reservations')
+    op.drop_table('reservations')
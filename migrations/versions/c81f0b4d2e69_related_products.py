@@ -0,0 +1,32 @@
+"""precomputed related products
+
+Revision ID: c81f0b4d2e69
+Revises: a6d41e9b7c23
+Create Date: 2026-10-17 23:12:48.517302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f0b4d2e69'
+down_revision = 'a6d41e9b7c23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_related',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('related_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['related_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('product_id', 'rank')
+    )
+
+
+def downgrade():
+    op.drop_table('product_related')
@@ -0,0 +1,40 @@
+"""background jobs
+
+Revision ID: d4e7a2c91f58
+Revises: c81f0b4d2e69
+Create Date: 2026-10-18 01:36:22.941870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e7a2c91f58'
+down_revision = 'c81f0b4d2e69'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status_created_at', 'jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_created_at', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,39 @@
+"""category stats summary table
+
+Revision ID: e5b18d9c3f46
+Revises: d2c64f8e1a07
+Create Date: 2026-10-17 14:05:51.662318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b18d9c3f46'
+down_revision = 'd2c64f8e1a07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('category_stats',
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('product_count', sa.Integer(), nullable=False),
+    sa.Column('min_price', sa.Float(), nullable=False),
+    sa.Column('max_price', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('category')
+    )
+    op.execute("""
+        INSERT INTO category_stats (category, product_count, min_price, max_price)
+        SELECT category, COUNT(id), MIN(price), MAX(price) FROM products GROUP BY category
+    """)
+
+    op.drop_index(op.f('ix_products_category'), table_name='products')
+    op.create_index('ix_products_category_price', 'products', ['category', 'price'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_products_category_price', table_name='products')
+    op.create_index(op.f('ix_products_category'), 'products', ['category'], unique=False)
+    op.drop_table('category_stats')
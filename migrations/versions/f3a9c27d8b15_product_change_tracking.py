@@ -0,0 +1,40 @@
+"""product updated_at and soft delete for the change feed
+
+Revision ID: f3a9c27d8b15
+Revises: e5b18d9c3f46
+Create Date: 2026-10-17 18:42:10.318204
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c27d8b15'
+down_revision = 'e5b18d9c3f46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite only accepts a constant default when adding a NOT NULL column,
+    # so existing rows are stamped with the migration time afterwards
+    op.add_column('products', sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                        server_default='1970-01-01 00:00:00'))
+    op.add_column('products', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # a bound datetime, so the value is stored in the format SQLAlchemy
+    # writes and compares with (CURRENT_TIMESTAMP has no fractional part
+    # and sorts differently as a SQLite string)
+    products = sa.table('products', sa.column('updated_at', sa.DateTime()))
+    op.execute(products.update().values(updated_at=datetime.utcnow()))
+    op.create_index('ix_products_updated_at_id', 'products', ['updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_products_updated_at_id', table_name='products')
+    # plain DROP COLUMN (SQLite 3.35+): recreating the table in a batch
+    # would drop the full-text search triggers on it
+    op.drop_column('products', 'deleted_at')
+    op.drop_column('products', 'updated_at')
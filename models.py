@@ -1,4 +1,4 @@
-from app import db
+from extensions import db
 from datetime import datetime
 
 class User(db.Model):
@@ -8,19 +8,34 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
+    role_changed_at = db.Column(db.DateTime, nullable=True, index=True)
 
 class Product(db.Model):
     __tablename__ = 'products'
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
     image_url = db.Column(db.String(255), nullable=False)
     stock = db.Column(db.Integer, nullable=False)
     category = db.Column(db.String(50), nullable=False)
+    # bumped by every write, including stock changes from checkout; deleted
+    # products are kept with deleted_at set so the change feed can report them
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = db.Column(db.DateTime, nullable=True)
+    # serves category filters and O(log n) min/max price per category;
+    # (updated_at, id) makes the change feed a range scan
+    __table_args__ = (
+        db.Index('ix_products_category_price', 'category', 'price'),
+        db.Index('ix_products_updated_at_id', 'updated_at', 'id'),
+    )
 
 class Cart(db.Model):
     __tablename__ = 'cart'
+    # also serves lookups by user_id alone, so no separate user_id index
+    __table_args__ = (
+        db.Index('uq_cart_user_product', 'user_id', 'product_id', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
@@ -28,8 +43,24 @@ class Cart(db.Model):
     user = db.relationship('User', backref=db.backref('cart_items', lazy=True))
     product = db.relationship('Product', backref=db.backref('cart_items', lazy=True))
 
+class GuestCartItem(db.Model):
+    __tablename__ = 'guest_cart'
+    # guest carts when the write-back cart store is off, so every worker
+    # sees the same cart; (updated_at) finds expired carts
+    __table_args__ = (
+        db.Index('ix_guest_cart_updated_at', 'updated_at'),
+    )
+    token = db.Column(db.String(64), primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True, autoincrement=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
 class Contact(db.Model):
     __tablename__ = 'contact'
+    # admin listing, export and retention all walk (created_at, id)
+    __table_args__ = (
+        db.Index('ix_contact_created_at_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), nullable=False)
@@ -38,6 +69,59 @@ class Contact(db.Model):
 
 class Newsletter(db.Model):
     __tablename__ = 'newsletter'
+    __table_args__ = (
+        db.Index('ix_newsletter_created_at_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class RelatedProduct(db.Model):
+    __tablename__ = 'product_related'
+    # written by `flask build-related`: the products most often in the same
+    # cart as product_id, best first, so a lookup is one primary key range
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    related_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+class Reservation(db.Model):
+    __tablename__ = 'reservations'
+    __table_args__ = (
+        db.Index('ix_reservations_status_expires_at', 'status', 'expires_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    checkout_id = db.Column(db.String(36), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='held')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class CategoryStats(db.Model):
+    __tablename__ = 'category_stats'
+    category = db.Column(db.String(50), primary_key=True)
+    product_count = db.Column(db.Integer, nullable=False)
+    min_price = db.Column(db.Float, nullable=False)
+    max_price = db.Column(db.Float, nullable=False)
+
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    # (status, created_at) finds queued and stuck jobs when a runner starts
+    __table_args__ = (
+        db.Index('ix_jobs_status_created_at', 'status', 'created_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    params = db.Column(db.JSON, nullable=False)
+    processed = db.Column(db.Integer, nullable=False, default=0)  # rows done so far, for progress
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import datetime
+
+from extensions import db
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort_value, row_id):
+    if isinstance(sort_value, datetime):
+        sort_value = {'dt': sort_value.isoformat()}
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise CursorError('Invalid cursor')
+    if isinstance(sort_value, dict) and set(sort_value) == {'dt'} and isinstance(sort_value['dt'], str):
+        try:
+            sort_value = datetime.fromisoformat(sort_value['dt'])
+        except ValueError:
+            raise CursorError('Invalid cursor')
+    # only what encode_cursor produces; anything else would reach the SQL
+    if isinstance(sort_value, bool) or not isinstance(sort_value, (str, int, float, datetime)):
+        raise CursorError('Invalid cursor')
+    if isinstance(row_id, bool) or not isinstance(row_id, int):
+        raise CursorError('Invalid cursor')
+    return sort_value, row_id
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise CursorError('Invalid limit')
+    if limit < 1:
+        raise CursorError('Invalid limit')
+    return min(limit, maximum)
+
+
+def keyset_page(query, sort_column, id_column, descending=False, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Fetch one page ordered by (sort_column, id_column).
+
+    Returns the rows and the cursor for the next page (None on the last page).
+    Each row must expose the sort and id columns under their column names.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        key = db.tuple_(sort_column, id_column)
+        query = query.filter(key < (sort_value, row_id) if descending else key > (sort_value, row_id))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
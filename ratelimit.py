@@ -0,0 +1,122 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request
+
+
+class MemoryBackend:
+    """Token buckets in a bounded dict; the least recently used buckets
+    are evicted once `max_keys` is reached, so a flood of distinct keys
+    costs bounded memory. Per process: each worker limits on its own."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """Take one token. Returns 0 if allowed, else seconds until one is free."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class RedisBackend:
+    """Token buckets shared by every worker, one Redis hash per key.
+
+    `client` is anything with redis-py's `register_script`, e.g.
+    `redis.Redis.from_url(...)`, or fakeredis as a local stand-in.
+    """
+
+    TAKE = """
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or burst
+    local updated_at = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + (now - updated_at) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.prefix = prefix
+        self._take = client.register_script(self.TAKE)
+
+    def take(self, key, rate, burst):
+        return float(self._take(keys=[self.prefix + key], args=[rate, burst]))
+
+
+def backend_from_uri(uri, max_keys):
+    if uri.startswith('memory://'):
+        return MemoryBackend(max_keys)
+    if uri.startswith(('redis://', 'rediss://')):
+        import redis
+        return RedisBackend(redis.Redis.from_url(uri))
+    raise ValueError(f'Unsupported RATE_LIMIT_STORAGE_URI: {uri}')
+
+
+class RateLimiter:
+    """Per-IP and per-email token buckets for the unauthenticated endpoints.
+
+    Limits are checked before the view runs, so a rejected request costs a
+    bucket lookup rather than a bcrypt hash or a database write.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.limits = {}
+        self.backend = None
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config['RATE_LIMIT_ENABLED']
+        # requests per minute -> tokens per second
+        self.limits = {scope: {kind: (per_minute / 60, burst) for kind, (per_minute, burst) in kinds.items()}
+                       for scope, kinds in config['RATE_LIMITS'].items()}
+        if self.backend is None:
+            self.backend = backend_from_uri(config['RATE_LIMIT_STORAGE_URI'], config['RATE_LIMIT_MAX_KEYS'])
+
+    def check(self, scope):
+        """Seconds the client must wait, or 0 if the request may proceed."""
+        limits = self.limits.get(scope, {})
+        if 'ip' in limits:
+            wait = self.backend.take(f'{scope}:ip:{request.remote_addr}', *limits['ip'])
+            if wait:
+                return wait
+        if 'email' in limits:
+            data = request.get_json(silent=True)
+            email = data.get('email') if isinstance(data, dict) else None
+            if isinstance(email, str) and email.strip():
+                return self.backend.take(f'{scope}:email:{email.strip().lower()}', *limits['email'])
+        return 0
+
+    def limit(self, scope):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    wait = self.check(scope)
+                    if wait:
+                        return {'message': 'Too many requests, please retry later'}, 429, \
+                            {'Retry-After': str(math.ceil(wait))}
+                return fn(*args, **kwargs)
+            return wrapper
+        return decorator
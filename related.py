@@ -0,0 +1,136 @@
+import itertools
+import logging
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from extensions import db, product_cache
+from models import Cart, RelatedProduct
+
+logger = logging.getLogger(__name__)
+
+# cart rows fetched per round trip, and co-occurring pairs generated per batch
+LOAD_CHUNK_SIZE = 50000
+PAIR_BATCH_SIZE = 2000000
+
+
+def load_cart_rows():
+    """(user_ids, product_ids) of every cart line as int64 arrays, ordered
+    by user so each cart is a contiguous run."""
+    import numpy as np
+
+    result = db.session.execute(
+        db.select(Cart.user_id, Cart.product_id).order_by(Cart.user_id)
+        .execution_options(yield_per=LOAD_CHUNK_SIZE)
+    )
+    # np.array() over Row objects goes through the sequence protocol row by
+    # row; flattening into fromiter is several times faster
+    chunks = [np.fromiter(itertools.chain.from_iterable(partition), dtype=np.int64)
+              for partition in result.partitions()]
+    rows = np.concatenate(chunks).reshape(-1, 2) if chunks else np.empty((0, 2), dtype=np.int64)
+    return rows[:, 0], rows[:, 1]
+
+
+def top_k_related(user_ids, product_ids, top_k, min_support=2, max_cart_size=50):
+    """Top-k co-occurring products per product.
+
+    Carts are grouped by size so each group is a dense (carts, size) array,
+    and every product pair of a group comes out of one fancy-indexing step
+    with the upper-triangle indices, so there is no per-cart Python loop.
+    Pairs are counted as sparse int64 keys (np.unique), never as a dense
+    products x products matrix. The score is the cosine of the two
+    products' cart vectors, count / sqrt(carts_a * carts_b), so popular
+    products do not crowd out everything else. Carts with more than
+    `max_cart_size` lines say little about any one pair and are skipped;
+    pairs seen in fewer than `min_support` carts are dropped.
+
+    Returns (product_id, rank, related_id, score) arrays, rank 0 first.
+    """
+    import numpy as np
+
+    ids, codes = np.unique(product_ids, return_inverse=True)
+    n = len(ids)
+    carts_with = np.bincount(codes, minlength=n)
+
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]]) if len(user_ids) else np.empty(0, np.int64)
+    sizes = np.diff(np.r_[starts, len(user_ids)])
+
+    keys = []
+    for size in np.unique(sizes):
+        if size < 2 or size > max_cart_size:
+            continue
+        left, right = np.triu_indices(size, 1)
+        group = starts[sizes == size]
+        # bound the pairs materialized at once
+        step = max(1, PAIR_BATCH_SIZE // len(left))
+        for offset in range(0, len(group), step):
+            carts = codes[group[offset:offset + step, None] + np.arange(size)]
+            a, b = carts[:, left].ravel(), carts[:, right].ravel()
+            keys.append(np.minimum(a, b).astype(np.int64) * n + np.maximum(a, b))
+    if not keys:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, np.empty(0)
+
+    pairs, counts = np.unique(np.concatenate(keys), return_counts=True)
+    keep = counts >= min_support
+    pairs, counts = pairs[keep], counts[keep]
+    a, b = pairs // n, pairs % n
+    score = counts / np.sqrt(carts_with[a] * carts_with[b])
+
+    # both directions, then best first within each product
+    source, target, score = np.r_[a, b], np.r_[b, a], np.r_[score, score]
+    order = np.lexsort((target, -score, source))
+    source, target, score = source[order], target[order], score[order]
+    index = np.arange(len(source))
+    first = np.r_[True, source[1:] != source[:-1]]
+    rank = index - np.maximum.accumulate(np.where(first, index, 0))
+    keep = rank < top_k
+    return ids[source[keep]], rank[keep], ids[target[keep]], score[keep]
+
+
+def rebuild(top_k, min_support, max_cart_size):
+    """Recompute product_related from the cart table in one transaction,
+    so readers see either the old neighbours or the new ones."""
+    started = time.perf_counter()
+    user_ids, product_ids = load_cart_rows()
+    loaded = time.perf_counter()
+    product_id, rank, related_id, score = top_k_related(user_ids, product_ids, top_k, min_support, max_cart_size)
+    computed = time.perf_counter()
+
+    table = RelatedProduct.__table__
+    db.session.execute(db.delete(table))
+    for offset in range(0, len(product_id), LOAD_CHUNK_SIZE):
+        chunk = slice(offset, offset + LOAD_CHUNK_SIZE)
+        db.session.execute(db.insert(table), [
+            {'product_id': p, 'rank': r, 'related_id': q, 'score': s}
+            for p, r, q, s in zip(product_id[chunk].tolist(), rank[chunk].tolist(),
+                                  related_id[chunk].tolist(), score[chunk].tolist())
+        ])
+    db.session.commit()
+    product_cache.invalidate_tags('related')
+
+    report = {
+        'cart_rows': len(user_ids),
+        'products': len(set(product_id.tolist())),
+        'related_rows': len(product_id),
+        'load_seconds': round(loaded - started, 2),
+        'compute_seconds': round(computed - loaded, 2),
+        'write_seconds': round(time.perf_counter() - computed, 2),
+    }
+    logger.info('Rebuilt related products: %s', report)
+    return report
+
+
+@click.command('build-related')
+@with_appcontext
+def build_related_command():
+    """Recompute "frequently added together" products from the cart table."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        raise click.ClickException('build-related needs NumPy (pip install numpy)')
+    config = current_app.config
+    report = rebuild(config['RELATED_TOP_K'], config['RELATED_MIN_SUPPORT'], config['RELATED_MAX_CART_SIZE'])
+    click.echo(', '.join(f'{key}={value}' for key, value in report.items()))
@@ -0,0 +1,71 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from extensions import db
+from models import Product, Reservation
+from workers import ProcessWorker
+
+logger = logging.getLogger(__name__)
+
+
+def release_expired(now=None):
+    """Return the stock of every held reservation that has expired.
+
+    Returns {product_id: released quantity}. The rows are claimed with
+    DELETE ... RETURNING so a confirm racing with the sweep cannot have
+    its stock handed back.
+    """
+    now = now or datetime.utcnow()
+    expired = db.session.execute(
+        db.delete(Reservation)
+        .where(Reservation.status == 'held', Reservation.expires_at <= now)
+        .returning(Reservation.product_id, Reservation.quantity)
+    ).all()
+
+    released = defaultdict(int)
+    for product_id, quantity in expired:
+        released[product_id] += quantity
+    if released:
+        products = Product.__table__
+        db.session.execute(
+            db.update(products).where(products.c.id == db.bindparam('pid'))
+            .values(stock=products.c.stock + db.bindparam('qty')),
+            [{'pid': pid, 'qty': qty} for pid, qty in released.items()]
+        )
+    db.session.commit()
+    return dict(released)
+
+
+class ReservationSweeper(ProcessWorker):
+    """Background thread that releases expired reservations every
+    RESERVATION_SWEEP_INTERVAL seconds."""
+
+    def __init__(self, on_release=None):
+        super().__init__()
+        self.on_release = on_release
+        self.interval = None
+        self._stop = threading.Event()
+
+    def _start(self, app):
+        self.interval = app.config['RESERVATION_SWEEP_INTERVAL']
+        self._stop.clear()
+        threading.Thread(target=self._run, name='reservation-sweeper', daemon=True).start()
+
+    def _shutdown(self):
+        self._stop.set()
+
+    def sweep(self):
+        with self.app.app_context():
+            released = release_expired()
+            if released and self.on_release:
+                self.on_release(list(released))
+        return released
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception('Reservation sweep failed')
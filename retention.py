@@ -0,0 +1,124 @@
+import gzip
+import logging
+import os
+from array import array
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from extensions import db
+from engine import read_session
+from models import Contact, Newsletter
+from serializers import dumps
+
+logger = logging.getLogger(__name__)
+
+# table -> (model, columns listed, exported and archived)
+TABLES = {
+    'contact': (Contact, ('id', 'name', 'email', 'message', 'created_at')),
+    'newsletter': (Newsletter, ('id', 'email', 'created_at')),
+}
+
+
+def row_dict(row, columns):
+    return {column: value.isoformat() if isinstance(value, datetime) else value
+            for column, value in zip(columns, row)}
+
+
+def iter_rows(table, chunk_size):
+    # oldest first; yield_per streams rows from a server-side cursor in chunk_size batches
+    model, columns = TABLES[table]
+    result = read_session().execute(
+        db.select(*[getattr(model, column) for column in columns])
+        .order_by(model.created_at, model.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for row in result:
+        yield row
+
+
+def _chunks(model, columns, before, chunk_size):
+    """Rows created before `before`, oldest first, one keyset page at a time."""
+    selected = [getattr(model, column) for column in columns]
+    key = db.tuple_(model.created_at, model.id)
+    last = None
+    while True:
+        query = db.select(*selected).where(model.created_at < before)
+        if last is not None:
+            query = query.where(key > last)
+        rows = db.session.execute(query.order_by(model.created_at, model.id).limit(chunk_size)).all()
+        if not rows:
+            return
+        last = (rows[-1].created_at, rows[-1].id)
+        yield rows
+
+
+def archive(table, before, directory, chunk_size):
+    """Move rows of `table` created before `before` into a gzipped NDJSON file.
+
+    The file is written and fsynced in full before any row is deleted, and
+    the rows are then deleted chunk_size at a time in short transactions,
+    so writers are never blocked for long. Only the ids written to the file
+    are deleted (kept as 8-byte ints, so memory stays small). A crash
+    between the two steps leaves the rows in place; the next run archives
+    them again, so archive files may overlap and should be deduplicated by id.
+    Returns {'table', 'archived', 'path'}.
+    """
+    model, columns = TABLES[table]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{table}-{before:%Y%m%dT%H%M%S}-{datetime.utcnow():%Y%m%dT%H%M%S}.ndjson.gz')
+    partial = path + '.partial'
+
+    archived_ids = array('q')
+    with open(partial, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as out:
+            for rows in _chunks(model, columns, before, chunk_size):
+                out.write(b''.join(dumps(row_dict(row, columns)) + b'\n' for row in rows))
+                archived_ids.extend(row.id for row in rows)
+        raw.flush()
+        os.fsync(raw.fileno())
+    db.session.rollback()  # end the read transaction before deleting
+
+    archived = len(archived_ids)
+    if not archived:
+        os.remove(partial)
+        return {'table': table, 'archived': 0, 'path': None}
+    os.replace(partial, path)
+
+    # exactly the rows that went into the file
+    for offset in range(0, archived, chunk_size):
+        ids = archived_ids[offset:offset + chunk_size].tolist()
+        db.session.execute(db.delete(model).where(model.id.in_(ids)))
+        db.session.commit()
+    logger.info('Archived %d %s rows created before %s to %s', archived, table, before.isoformat(), path)
+    return {'table': table, 'archived': archived, 'path': path}
+
+
+def archive_expired(config, tables=None, older_than_days=None):
+    """Archive each table (default: all) past its RETENTION_DAYS, or past
+    `older_than_days` when given. Yields archive() results, or
+    {'table', 'archived': None} for tables without a retention period."""
+    for table in tables or sorted(TABLES):
+        days = older_than_days if older_than_days is not None else config['RETENTION_DAYS'].get(table)
+        if days is None:
+            yield {'table': table, 'archived': None, 'path': None}
+            continue
+        before = datetime.utcnow() - timedelta(days=days)
+        yield archive(table, before, config['ARCHIVE_DIR'], config['ARCHIVE_CHUNK_SIZE'])
+
+
+@click.command('archive')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(sorted(TABLES)),
+              help='Table to archive (repeatable, default: all).')
+@click.option('--older-than-days', type=int, help='Overrides RETENTION_DAYS.')
+@with_appcontext
+def archive_command(tables, older_than_days):
+    """Move contact and newsletter rows past their retention age to ARCHIVE_DIR."""
+    for result in archive_expired(current_app.config, tables, older_than_days):
+        if result['archived'] is None:
+            click.echo(f"{result['table']}: no retention configured, skipped")
+            continue
+        click.echo(f"{result['table']}: archived {result['archived']} rows" +
+                   (f" to {result['path']}" if result['path'] else ''))
@@ -1,10 +1,33 @@
 from flask_restx import Namespace, Resource, fields
-from flask import request
+from flask import request, current_app, Response, stream_with_context, url_for
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from app import db
-from models import User, Product, Cart as CartModel, Contact as ContactModel, Newsletter as NewsletterModel
-import bcrypt
-from datetime import datetime
+from extensions import db, product_cache, product_fragment_cache, password_hasher, rate_limiter
+from models import User, Product, Cart as CartModel, Contact as ContactModel, Newsletter as NewsletterModel, Reservation, \
+    RelatedProduct, Job, GuestCartItem as GuestCartItemModel
+from dbutil import dialect_insert
+from engine import read_session
+from pagination import CursorError, encode_cursor, keyset_page, parse_limit
+from hashing import HasherBusy
+from auth import admin_required, role_changes, role_claims
+from reservations import ReservationSweeper, release_expired
+import bulk
+import related
+import retention
+from search import search_products
+import facets
+import serializers
+from serializers import PRODUCT_FIELDS, Representation
+from writebehind import QueueFull, WriteBehindQueue
+from cartstore import CartStore, GuestCartTable
+from jobs import JobRunner
+from jsonschema import Draft4Validator
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timedelta
 
 api_ns = Namespace('api', description='Main API endpoints')
 
@@ -31,6 +54,17 @@ cart_model = api_ns.model('CartInput', {
     'quantity': fields.Integer(required=True, description='Quantity')
 })
 
+cart_operation_model = api_ns.model('CartOperation', {
+    'op': fields.String(required=True, enum=['add', 'set', 'remove'], description='add to, set or remove a line'),
+    'product_id': fields.Integer(required=True, description='Product ID'),
+    'quantity': fields.Integer(required=False, description='Quantity (add defaults to 1, unused by remove)')
+})
+
+cart_batch_model = api_ns.model('CartBatchInput', {
+    'operations': fields.List(fields.Nested(cart_operation_model), required=True,
+                              description='Applied in order, all or nothing')
+})
+
 contact_model = api_ns.model('ContactInput', {
     'name': fields.String(required=True, description='Contact name'),
     'email': fields.String(required=True, description='Contact email'),
@@ -41,12 +75,347 @@ newsletter_model = api_ns.model('NewsletterInput', {
     'email': fields.String(required=True, description='Newsletter email')
 })
 
+job_model = api_ns.model('JobInput', {
+    'kind': fields.String(required=True, enum=['cart_cleanup', 'release_reservations', 'build_related', 'archive'],
+                          description='Maintenance job to run'),
+    'params': fields.Raw(required=False, description='Job parameters, e.g. {"product_ids": [...]} for cart_cleanup')
+})
+
+role_model = api_ns.model('RoleInput', {
+    'is_admin': fields.Boolean(required=True, description='Grant or revoke admin access')
+})
+
 
 # Helpers
 
-def is_admin(user_id):
-    user = User.query.get(user_id)
-    return user.is_admin if user else False
+HASHER_BUSY_RESPONSE = ({'message': 'Server busy, please retry'}, 503, {'Retry-After': '1'})
+
+EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+
+# field -> max length; name and email match the contact/newsletter columns
+CONTACT_FIELDS = {'name': 100, 'email': 120, 'message': 5000}
+NEWSLETTER_FIELDS = {'email': 120}
+
+
+def submission_error(data, limits):
+    """Why `data` is not a valid submission, or None. Checked before a row
+    is queued for write-behind, where the database would only reject it
+    later, in a batch with other people's rows."""
+    if not isinstance(data, dict):
+        return 'Expected a JSON object'
+    for field, max_length in limits.items():
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return f'{field.capitalize()} is required'
+        if len(value) > max_length:
+            return f'{field.capitalize()} must be at most {max_length} characters'
+    if 'email' in limits and not EMAIL_PATTERN.fullmatch(data['email']):
+        return 'Invalid email'
+    return None
+
+
+# sort name -> (column, descending)
+PRODUCT_SORTS = {
+    'newest': (Product.id, True),
+    'price': (Product.price, False),
+    '-price': (Product.price, True),
+    'name': (Product.name, False),
+    '-name': (Product.name, True),
+}
+
+product_list_params = {
+    'sort': 'Sort order: newest (default), price, -price, name, -name',
+    'fields': 'Comma-separated list of fields to return',
+    'limit': 'Page size (default 50, max 200)',
+    'cursor': 'Cursor from the X-Next-Cursor header of the previous page',
+}
+
+
+def list_products(args, category=None, session=None):
+    sort = args.get('sort', 'newest')
+    if sort not in PRODUCT_SORTS:
+        return {'message': 'Invalid sort'}, 400
+    sort_column, descending = PRODUCT_SORTS[sort]
+
+    fields = PRODUCT_FIELDS
+    if args.get('fields'):
+        fields = tuple(f.strip() for f in args['fields'].split(',') if f.strip())
+        if not fields or any(f not in PRODUCT_FIELDS for f in fields):
+            return {'message': 'Invalid fields'}, 400
+
+    # Full products are assembled from cached per-product fragments, so the
+    # page query only needs the keys. The sort key and id are always
+    # selected so the next cursor can be built.
+    session = session or db.session
+    full = fields == PRODUCT_FIELDS
+    selected = list(dict.fromkeys((() if full else fields) + ('id', sort_column.key)))
+    query = session.query(*[getattr(Product, f) for f in selected]).filter(Product.deleted_at.is_(None))
+    if category:
+        query = query.filter(Product.category == category)
+
+    try:
+        limit = parse_limit(args.get('limit'))
+        rows, next_cursor = keyset_page(query, sort_column, Product.id, descending,
+                                        args.get('cursor'), limit)
+    except CursorError as e:
+        return {'message': str(e)}, 400
+
+    headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+    if full:
+        body = serializers.json_array(product_fragments([row.id for row in rows], session))
+    else:
+        body = serializers.dumps([serializers.product_dict(row, fields) for row in rows])
+    return body, 200, headers
+
+
+def product_fragments(product_ids, session):
+    """Encoded JSON for each product, in product_ids order, from the
+    fragment cache or one IN query for the misses."""
+    fragments = {}
+    missing = []
+    for product_id in product_ids:
+        fragment = product_fragment_cache.get(product_id)
+        if fragment is None:
+            missing.append(product_id)
+        else:
+            fragments[product_id] = fragment
+    if missing:
+        columns = [getattr(Product, f) for f in PRODUCT_FIELDS]
+        for row in session.query(*columns).filter(Product.id.in_(missing), Product.deleted_at.is_(None)):
+            fragments[row.id] = serializers.encode_product(row)
+            product_fragment_cache.set(row.id, fragments[row.id])
+    return [fragments[product_id] for product_id in product_ids if product_id in fragments]
+
+
+def json_response(result):
+    if result[1] != 200:
+        return result
+    body = result[0] if isinstance(result[0], bytes) else serializers.dumps(result[0])
+    return Representation(body, result[2] if len(result) > 2 else None).respond(request)
+
+
+# Catalog cache: list pages are tagged with the category they filter on (or
+# 'products:all'), single products with their id, so an admin write only
+# drops the entries it can actually change.
+
+PRODUCT_LIST_ARGS = ('category', 'sort', 'fields', 'limit', 'cursor')
+
+
+def product_list_cache_key(args):
+    return ('products',) + tuple(args.get(arg) for arg in PRODUCT_LIST_ARGS)
+
+
+def product_list_cache_tag(category):
+    return f'category:{category}' if category else 'products:all'
+
+
+def cached_response(key, tags, loader):
+    entry = product_cache.get(key)
+    if entry is None:
+        result = loader()
+        if result[1] != 200:
+            return result
+        body = result[0] if isinstance(result[0], bytes) else serializers.dumps(result[0])
+        entry = Representation(body, result[2] if len(result) > 2 else None)
+        product_cache.set(key, entry, tags)
+    return entry.respond(request)
+
+
+def invalidate_product(product_id, *categories):
+    product_fragment_cache.delete(product_id)
+    product_cache.invalidate_tags(f'product:{product_id}', 'products:all',
+                                  *(f'category:{c}' for c in categories))
+
+
+def invalidate_products(product_ids):
+    rows = db.session.query(Product.id, Product.category).filter(Product.id.in_(product_ids)).all()
+    for product_id, category in rows:
+        invalidate_product(product_id, category)
+
+
+reservation_sweeper = ReservationSweeper(on_release=invalidate_products)
+
+write_behind = WriteBehindQueue()
+
+
+def write_behind_enabled():
+    if not current_app.config['WRITE_BEHIND_ENABLED']:
+        return False
+    write_behind.ensure_started(current_app._get_current_object())
+    return True
+
+
+product_validator = Draft4Validator(product_model.__schema__)
+
+bulk_params = {
+    'chunk_size': 'Rows per transaction (default PRODUCT_IMPORT_CHUNK_SIZE, max 10000)',
+}
+
+
+submission_list_params = {
+    'limit': 'Page size (default 50, max 200)',
+    'cursor': 'Cursor from the X-Next-Cursor header of the previous page',
+}
+
+
+def list_submissions(table, args):
+    """Newest first, keyset paged on (created_at, id)."""
+    model, columns = retention.TABLES[table]
+    query = db.session.query(*[getattr(model, column) for column in columns])
+    try:
+        limit = parse_limit(args.get('limit'))
+        rows, next_cursor = keyset_page(query, model.created_at, model.id, True, args.get('cursor'), limit)
+    except CursorError as e:
+        return {'message': str(e)}, 400
+    headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+    return [retention.row_dict(row, columns) for row in rows], 200, headers
+
+
+def export_submissions(table):
+    try:
+        chunk_size = parse_chunk_size(request.args.get('chunk_size'))
+    except ValueError:
+        return {'message': 'Invalid chunk_size'}, 400
+
+    body = bulk.export_csv(retention.iter_rows(table, chunk_size), retention.TABLES[table][1])
+    headers = {'Content-Disposition': f'attachment; filename={table}.csv', 'Vary': 'Accept-Encoding'}
+    encoding = serializers.negotiate_encoding(request.accept_encodings)
+    if encoding:
+        body = serializers.compress_stream(body, encoding)
+        headers['Content-Encoding'] = encoding
+    return Response(stream_with_context(body), mimetype='text/csv', headers=headers)
+
+
+def parse_chunk_size(value):
+    if value is None:
+        return current_app.config['PRODUCT_IMPORT_CHUNK_SIZE']
+    chunk_size = int(value)
+    if not 1 <= chunk_size <= 10000:
+        raise ValueError('chunk_size out of range')
+    return chunk_size
+
+
+PRODUCT_IMPORT_FORMATS = {
+    'application/x-ndjson': bulk.parse_ndjson,
+    'application/jsonl': bulk.parse_ndjson,
+    'text/csv': bulk.parse_csv,
+}
+
+
+def import_product_stream(stream, mimetype, chunk_size, progress=None):
+    """Import a product body, then rebuild the facets and drop the cached
+    pages it touched. See bulk.import_products for the report."""
+    rows = PRODUCT_IMPORT_FORMATS[mimetype](bulk.decode_lines(stream))
+    categories = set()
+    try:
+        return bulk.import_products(rows, product_validator, chunk_size, categories, progress)
+    finally:
+        # chunks committed before a failure are in the table; count them too
+        db.session.rollback()
+        if categories:
+            facets.rebuild(categories)
+            db.session.commit()
+        product_cache.invalidate_tags('products:all', *(f'category:{c}' for c in categories))
+
+
+# Background jobs: admin calls that touch many rows queue a job and answer
+# 202 with a Location to poll; see jobs.JobRunner.
+
+job_runner = JobRunner()
+
+ADMIN_JOB_KINDS = ('cart_cleanup', 'release_reservations', 'build_related', 'archive')
+
+
+def jobs():
+    job_runner.ensure_started(current_app._get_current_object())
+    return job_runner
+
+
+def job_dict(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        # spool paths are an implementation detail
+        'params': {key: value for key, value in job.params.items() if key != 'path'},
+        'processed': job.processed,
+        'result': job.result,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def job_accepted(job, headers=None):
+    return job_dict(job), 202, {'Location': url_for('api_admin_job', job_id=job.id), **(headers or {})}
+
+
+@job_runner.handler('cart_cleanup')
+def cleanup_carts(params, progress):
+    """Delete cart lines of deleted products: all of them, or params['product_ids'].
+    Also drops guest cart lines of those products and expired guest carts."""
+    deleted = db.select(Product.id).where(Product.deleted_at.isnot(None))
+    if params.get('product_ids'):
+        deleted = deleted.where(Product.id.in_(params['product_ids']))
+    batch = db.select(CartModel.id).where(CartModel.product_id.in_(deleted)) \
+        .limit(current_app.config['JOB_BATCH_SIZE']).scalar_subquery()
+    removed = 0
+    while True:
+        count = db.session.execute(db.delete(CartModel).where(CartModel.id.in_(batch))).rowcount
+        if not count:
+            break
+        removed += count
+        progress(removed)
+        db.session.commit()
+    guest_removed = db.session.execute(db.delete(GuestCartItemModel).where(db.or_(
+        GuestCartItemModel.product_id.in_(deleted),
+        GuestCartItemModel.updated_at < GuestCartTable.cutoff()
+    ))).rowcount
+    db.session.commit()
+    return {'removed': removed, 'guest_removed': guest_removed}
+
+
+@job_runner.handler('release_reservations')
+def release_reservations(params, progress):
+    """Hand back the stock of expired reservations now instead of at the
+    sweeper's next pass, then rebuild the category stats. Product stock is
+    not recounted: there is no ledger to recount it from."""
+    released = release_expired()
+    invalidate_products(list(released))
+    facets.rebuild()
+    db.session.commit()
+    product_cache.invalidate_tags('products:all')
+    return {'released_products': len(released), 'released_units': sum(released.values())}
+
+
+@job_runner.handler('product_import')
+def import_spooled_products(params, progress):
+    try:
+        with open(params['path'], 'rb') as body:
+            report = import_product_stream(body, params['mimetype'], params['chunk_size'], progress)
+    finally:
+        os.remove(params['path'])
+    if 'aborted' in report:
+        raise ValueError(import_aborted_message(report))
+    return report
+
+
+def import_aborted_message(report):
+    aborted = report['aborted']
+    return (f"{aborted['message']} (line {aborted['line']}); "
+            f"the {report['inserted']} valid rows before it were imported")
+
+
+@job_runner.handler('build_related')
+def build_related(params, progress):
+    config = current_app.config
+    return related.rebuild(config['RELATED_TOP_K'], config['RELATED_MIN_SUPPORT'], config['RELATED_MAX_CART_SIZE'])
+
+
+@job_runner.handler('archive')
+def archive_submissions(params, progress):
+    return {'tables': list(retention.archive_expired(current_app.config))}
 
 
 
@@ -55,7 +424,9 @@ def is_admin(user_id):
 @api_ns.route('/signup')
 class Signup(Resource):
     @api_ns.expect(user_model)
-    @api_ns.doc(responses={201: 'Created', 400: 'Bad Request'})
+    @api_ns.doc(responses={201: 'Created', 400: 'Bad Request', 429: 'Too Many Requests',
+                           503: 'Service Unavailable'})
+    @rate_limiter.limit('signup')
     def post(self):
         data = request.get_json()
         username = data.get('username')
@@ -68,9 +439,12 @@ class Signup(Resource):
         if User.query.filter_by(email=email).first():
             return {'message': 'Email already exists'}, 400
 
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        try:
+            hashed_password = password_hasher.hash(password)
+        except HasherBusy:
+            return HASHER_BUSY_RESPONSE
 
-        new_user = User(username=username, email=email, password=hashed_password.decode('utf-8'))
+        new_user = User(username=username, email=email, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
 
@@ -80,18 +454,32 @@ class Signup(Resource):
 @api_ns.route('/login')
 class Login(Resource):
     @api_ns.expect(user_model)
-    @api_ns.doc(responses={200: 'Success', 401: 'Unauthorized'})
+    @api_ns.doc(responses={200: 'Success', 401: 'Unauthorized', 429: 'Too Many Requests',
+                           503: 'Service Unavailable'})
+    @rate_limiter.limit('login')
     def post(self):
         data = request.get_json()
         email = data.get('email')
         password = data.get('password')
 
         user = User.query.filter_by(email=email).first()
-        if not user or not bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8')):
-            return {'message': 'Invalid credentials'}, 401
+        try:
+            if not user or not password_hasher.check(password, user.password):
+                return {'message': 'Invalid credentials'}, 401
 
-        access_token = create_access_token(identity=user.id)
-        return {'access_token': access_token, 'is_admin': user.is_admin}, 200
+            # transparently upgrade hashes made with a different work factor
+            if password_hasher.needs_rehash(user.password):
+                user.password = password_hasher.hash(password)
+                db.session.commit()
+        except HasherBusy:
+            return HASHER_BUSY_RESPONSE
+
+        access_token = create_access_token(identity=user.id, additional_claims=role_claims(user))
+        response = {'access_token': access_token, 'is_admin': user.is_admin}
+        cart_token = request.headers.get('X-Cart-Token')
+        if cart_token:
+            response['cart_items_merged'] = merge_guest_cart(cart_token, user.id)
+        return response, 200
 
 
 
@@ -100,13 +488,23 @@ class Login(Resource):
 @api_ns.route('/newsletter')
 class NewsletterResource(Resource):
     @api_ns.expect(newsletter_model)
-    @api_ns.doc(responses={201: 'Created', 400: 'Bad Request'})
+    @api_ns.doc(responses={201: 'Created', 202: 'Accepted (write-behind mode)', 400: 'Bad Request',
+                           429: 'Too Many Requests'})
+    @rate_limiter.limit('newsletter')
     def post(self):
         data = request.get_json()
-        email = data.get('email')
-
-        if not email:
-            return {'message': 'Email is required'}, 400
+        error = submission_error(data, NEWSLETTER_FIELDS)
+        if error:
+            return {'message': error}, 400
+        email = data['email']
+
+        if write_behind_enabled():
+            try:
+                if not write_behind.subscribe(email):
+                    return {'message': 'Email already subscribed'}, 400
+                return {'message': 'Subscribed to newsletter'}, 202
+            except QueueFull:
+                pass  # fall back to a direct write
 
         if NewsletterModel.query.filter_by(email=email).first():
             return {'message': 'Email already subscribed'}, 400
@@ -124,15 +522,22 @@ class NewsletterResource(Resource):
 @api_ns.route('/contact')
 class ContactResource(Resource):
     @api_ns.expect(contact_model)
-    @api_ns.doc(responses={201: 'Created', 400: 'Bad Request'})
+    @api_ns.doc(responses={201: 'Created', 202: 'Accepted (write-behind mode)', 400: 'Bad Request',
+                           429: 'Too Many Requests'})
+    @rate_limiter.limit('contact')
     def post(self):
         data = request.get_json()
-        name = data.get('name')
-        email = data.get('email')
-        message = data.get('message')
-
-        if not all([name, email, message]):
-            return {'message': 'All fields are required'}, 400
+        error = submission_error(data, CONTACT_FIELDS)
+        if error:
+            return {'message': error}, 400
+        name, email, message = data['name'], data['email'], data['message']
+
+        if write_behind_enabled():
+            try:
+                write_behind.contact(name, email, message)
+                return {'message': 'Message sent successfully'}, 202
+            except QueueFull:
+                pass  # fall back to a direct write
 
         new_contact = ContactModel(name=name, email=email, message=message, created_at=datetime.utcnow())
         db.session.add(new_contact)
@@ -146,45 +551,264 @@ class ContactResource(Resource):
 
 @api_ns.route('/products')
 class Products(Resource):
-    @api_ns.doc(responses={200: 'Success'}, params={'category': 'Filter products by category'})
+    @api_ns.doc(responses={200: 'Success', 304: 'Not Modified', 400: 'Bad Request'},
+                params={'category': 'Filter products by category', **product_list_params},
+                description='Returns one page of products (50 unless ?limit is given). While more '
+                            'remain, the response carries an X-Next-Cursor header; pass it back as '
+                            '?cursor= to fetch the next page.')
     def get(self):
         category = request.args.get('category')
-        query = Product.query
-        if category:
-            query = query.filter_by(category=category)
-        products = query.all()
-        return [{
-            'id': p.id,
-            'name': p.name,
-            'description': p.description,
-            'price': p.price,
-            'image_url': p.image_url,
-            'stock': p.stock,
-            'category': p.category
-        } for p in products], 200
+        key = product_list_cache_key(request.args)
+        tag = product_list_cache_tag(category)
+        return cached_response(key, (tag,), lambda: list_products(request.args, category=category,
+                                                                  session=read_session()))
+
+
+@api_ns.route('/products/facets')
+class ProductFacets(Resource):
+    @api_ns.doc(responses={200: 'Success', 304: 'Not Modified'})
+    def get(self):
+        return cached_response(('facets',), ('products:all',), lambda: (facets.facets(), 200))
+
+
+@api_ns.route('/products/search')
+class ProductSearch(Resource):
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request'}, params={
+        'q': 'Search terms, matched as prefixes against name and description',
+        'category': 'Filter products by category',
+        'limit': 'Page size (default 20, max 100)',
+        'offset': 'Number of results to skip',
+    })
+    def get(self):
+        q = request.args.get('q', '').strip()
+        if not q:
+            return {'message': 'q is required'}, 400
+        try:
+            limit = parse_limit(request.args.get('limit'), default=20, maximum=100)
+            offset = int(request.args.get('offset', 0))
+        except (CursorError, ValueError):
+            return {'message': 'Invalid limit or offset'}, 400
+        if offset < 0:
+            return {'message': 'Invalid limit or offset'}, 400
+
+        rows = search_products(q, category=request.args.get('category'), limit=limit, offset=offset)
+        return json_response(([serializers.product_dict(row) for row in rows], 200))
+
+
+@api_ns.route('/products/changes')
+class ProductChanges(Resource):
+    @api_ns.doc(responses={200: 'Success', 304: 'Not Modified', 400: 'Bad Request'}, params={
+        'since': 'cursor from the previous response; omit for a full sync',
+        'limit': 'Page size (default 500, max 1000)',
+    })
+    def get(self):
+        """Products created, updated or deleted after `since`, oldest change
+        first. Clients store the returned cursor and poll with it; deleted
+        products come back as {id, deleted: true}. Changes show up once they
+        are PRODUCT_CHANGES_LAG seconds old."""
+        since = request.args.get('since')
+        columns = [getattr(Product, f) for f in PRODUCT_FIELDS] + [Product.updated_at, Product.deleted_at]
+        # updated_at is stamped at flush, not at commit; rows still younger
+        # than the lag may belong to transactions that have yet to commit
+        settled = datetime.utcnow() - timedelta(seconds=current_app.config['PRODUCT_CHANGES_LAG'])
+        query = read_session().query(*columns).filter(Product.updated_at <= settled)
+        if not since:
+            # a full sync has nothing to delete
+            query = query.filter(Product.deleted_at.is_(None))
+        try:
+            limit = parse_limit(request.args.get('limit'), default=500, maximum=1000)
+            rows, next_cursor = keyset_page(query, Product.updated_at, Product.id, False, since, limit)
+        except CursorError as e:
+            return {'message': str(e)}, 400
+
+        changes = []
+        for row in rows:
+            if row.deleted_at is not None:
+                change = {'id': row.id, 'deleted': True}
+            else:
+                change = dict(serializers.product_dict(row), deleted=False)
+            change['updated_at'] = row.updated_at.isoformat()
+            changes.append(change)
+        cursor = encode_cursor(rows[-1].updated_at, rows[-1].id) if rows else since
+        return json_response(({'changes': changes, 'cursor': cursor, 'has_more': next_cursor is not None}, 200))
 
 
 @api_ns.route('/products/<int:product_id>')
 class ProductItem(Resource):
-    @api_ns.doc(responses={200: 'Success', 404: 'Not Found'})
+    @api_ns.doc(responses={200: 'Success', 304: 'Not Modified', 404: 'Not Found'})
     def get(self, product_id):
-        product = Product.query.get(product_id)
-        if not product:
+        return cached_response(('product', product_id), (f'product:{product_id}',),
+                               lambda: self.load(product_id))
+
+    @staticmethod
+    def load(product_id):
+        fragments = product_fragments([product_id], read_session())
+        if not fragments:
+            return {'message': 'Product not found'}, 404
+        return fragments[0], 200
+
+
+@api_ns.route('/products/<int:product_id>/related')
+class ProductRelated(Resource):
+    @api_ns.doc(responses={200: 'Success', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found'},
+                params={'limit': 'Number of products (default 10, max RELATED_TOP_K)'})
+    def get(self, product_id):
+        """Products most often added to carts together with this one, padded
+        with the newest products of its category when it has too few."""
+        try:
+            limit = parse_limit(request.args.get('limit'), default=10,
+                                maximum=current_app.config['RELATED_TOP_K'])
+        except CursorError as e:
+            return {'message': str(e)}, 400
+        # 'products:all' drops pages whose related products were edited or deleted
+        return cached_response(('related', product_id, limit), (f'product:{product_id}', 'products:all', 'related'),
+                               lambda: self.load(product_id, limit))
+
+    @staticmethod
+    def load(product_id, limit):
+        session = read_session()
+        category = session.query(Product.category) \
+            .filter(Product.id == product_id, Product.deleted_at.is_(None)).scalar()
+        if category is None:
             return {'message': 'Product not found'}, 404
-        return {
-            'id': product.id,
-            'name': product.name,
-            'description': product.description,
-            'price': product.price,
-            'image_url': product.image_url,
-            'stock': product.stock,
-            'category': product.category
-        }, 200
+
+        related_ids = [related_id for related_id, in session.query(RelatedProduct.related_id)
+                       .filter(RelatedProduct.product_id == product_id)
+                       .order_by(RelatedProduct.rank).limit(limit)]
+        fragments = product_fragments(related_ids, session)
+        if len(fragments) < limit:
+            # cold product, or some neighbours were deleted
+            fallback_ids = [row_id for row_id, in session.query(Product.id)
+                            .filter(Product.category == category, Product.deleted_at.is_(None),
+                                    Product.id.notin_(related_ids + [product_id]))
+                            .order_by(Product.id.desc()).limit(limit - len(fragments))]
+            fragments += product_fragments(fallback_ids, session)
+        return serializers.json_array(fragments), 200
 
 
 
 # Cart Routes
 
+cart_store = CartStore()
+
+
+def cart_store_enabled():
+    if not current_app.config['CART_STORE_ENABLED']:
+        return False
+    cart_store.ensure_started(current_app._get_current_object())
+    return True
+
+
+guest_cart_table = GuestCartTable()
+
+
+def guest_carts():
+    # the store's memory is per process, so without it guest carts go to a
+    # table every worker can read
+    return cart_store if cart_store_enabled() else guest_cart_table
+
+
+def product_stock(product_ids):
+    """{product_id: stock} for the given products that can be added to a cart."""
+    return dict(db.session.query(Product.id, Product.stock)
+                .filter(Product.id.in_(list(product_ids)), Product.deleted_at.is_(None)))
+
+
+def cart_products(product_ids):
+    rows = db.session.query(Product.id, Product.name, Product.price, Product.image_url, Product.category) \
+        .filter(Product.id.in_(list(product_ids)), Product.deleted_at.is_(None))
+    return {row.id: row for row in rows}
+
+
+def stored_cart_lines(user_id):
+    cart_store.ensure_ids(user_id)
+    lines = cart_store.lines(user_id)
+    products = cart_products(product_id for _, product_id, _ in lines)
+    return [{
+        'id': line_id,
+        'product_id': product_id,
+        'name': products[product_id].name,
+        'price': products[product_id].price,
+        'quantity': quantity,
+        'image_url': products[product_id].image_url,
+        'category': products[product_id].category
+    } for line_id, product_id, quantity in lines if product_id in products]
+
+
+def merge_guest_cart(token, user_id):
+    """Move a guest cart into the user's cart, skipping products that are
+    gone or short of stock. Returns the number of lines merged."""
+    lines = guest_carts().take_guest(token)
+    stock = product_stock(lines) if lines else {}
+    lines = {product_id: quantity for product_id, quantity in lines.items() if stock.get(product_id, -1) >= quantity}
+    if not lines:
+        db.session.commit()
+        return 0
+    if cart_store_enabled():
+        for product_id, quantity in lines.items():
+            cart_store.add(user_id, product_id, quantity)
+        return len(lines)
+    stmt = dialect_insert(CartModel).values([
+        {'user_id': user_id, 'product_id': product_id, 'quantity': quantity}
+        for product_id, quantity in lines.items()
+    ])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['user_id', 'product_id'],
+        set_={'quantity': CartModel.quantity + stmt.excluded.quantity}
+    ))
+    db.session.commit()
+    return len(lines)
+
+
+def cart_lines(user_id):
+    if cart_store_enabled():
+        return stored_cart_lines(user_id)
+    cart_items = db.session.query(
+        CartModel.id, CartModel.product_id, CartModel.quantity,
+        Product.name, Product.price, Product.image_url, Product.category
+    ).join(Product, CartModel.product_id == Product.id) \
+        .filter(CartModel.user_id == user_id, Product.deleted_at.is_(None)) \
+        .order_by(CartModel.id).all()
+    return [{
+        'id': item.id,
+        'product_id': item.product_id,
+        'name': item.name,
+        'price': item.price,
+        'quantity': item.quantity,
+        'image_url': item.image_url,
+        'category': item.category
+    } for item in cart_items]
+
+
+def valid_quantity(quantity):
+    # bool is an int subclass; JSON true is not a quantity
+    return isinstance(quantity, int) and not isinstance(quantity, bool) and quantity >= 1
+
+
+def parse_cart_operations(data, max_operations):
+    """List of (op, product_id, quantity), or an error message."""
+    operations = (data or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        return 'operations must be a non-empty list'
+    if len(operations) > max_operations:
+        return f'At most {max_operations} operations per request'
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            return f'Operation {index} must be an object'
+        op = operation.get('op')
+        product_id = operation.get('product_id')
+        quantity = operation.get('quantity', 1 if op == 'add' else None)
+        if op not in ('add', 'set', 'remove'):
+            return f'Operation {index}: op must be add, set or remove'
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            return f'Operation {index}: invalid product_id'
+        if op != 'remove' and not valid_quantity(quantity):
+            return f'Operation {index}: invalid quantity'
+        parsed.append((op, product_id, quantity))
+    return parsed
+
+
 @api_ns.route('/cart')
 class Cart(Resource):
     @api_ns.expect(cart_model)
@@ -195,35 +819,144 @@ class Cart(Resource):
         data = request.get_json()
         product_id = data.get('product_id')
         quantity = data.get('quantity', 1)
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            return {'message': 'Invalid product_id'}, 400
+        if not valid_quantity(quantity):
+            return {'message': 'Invalid quantity'}, 400
 
-        product = Product.query.get(product_id)
-        if not product or product.stock < quantity:
+        if cart_store_enabled():
+            if product_stock([product_id]).get(product_id, -1) < quantity:
+                return {'message': 'Product not available or insufficient stock'}, 400
+            cart_store.add(user_id, product_id, quantity)
+            return {'message': 'Added to cart'}, 201
+
+        # One statement: the stock check, the insert and the quantity bump on
+        # an existing line all happen atomically, so concurrent adds cannot
+        # create duplicate lines.
+        stmt = dialect_insert(CartModel).from_select(
+            ['user_id', 'product_id', 'quantity'],
+            db.select(db.literal(user_id), Product.id, db.literal(quantity))
+            .where(Product.id == product_id, Product.stock >= quantity, Product.deleted_at.is_(None))
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'product_id'],
+            set_={'quantity': CartModel.quantity + stmt.excluded.quantity}
+        )
+        result = db.session.execute(stmt)
+        if result.rowcount == 0:
+            db.session.rollback()
             return {'message': 'Product not available or insufficient stock'}, 400
 
-        cart_item = CartModel.query.filter_by(user_id=user_id, product_id=product_id).first()
-        if cart_item:
-            cart_item.quantity += quantity
-        else:
-            cart_item = CartModel(user_id=user_id, product_id=product_id, quantity=quantity)
-            db.session.add(cart_item)
-
         db.session.commit()
         return {'message': 'Added to cart'}, 201
 
     @api_ns.doc(responses={200: 'Success'}, security='Bearer')
     @jwt_required()
     def get(self):
+        return cart_lines(get_jwt_identity()), 200
+
+
+@api_ns.route('/cart/batch')
+class CartBatch(Resource):
+    @api_ns.expect(cart_batch_model)
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request'}, security='Bearer')
+    @jwt_required()
+    def post(self):
+        """Apply many add/set/remove operations in one transaction and
+        return the resulting cart, e.g. to merge a guest cart after login."""
         user_id = get_jwt_identity()
-        cart_items = CartModel.query.filter_by(user_id=user_id).all()
-        return [{
-            'id': item.id,
-            'product_id': item.product_id,
-            'name': item.product.name,
-            'price': item.product.price,
-            'quantity': item.quantity,
-            'image_url': item.product.image_url,
-            'category': item.product.category
-        } for item in cart_items], 200
+        operations = parse_cart_operations(request.get_json(silent=True),
+                                           current_app.config['CART_BATCH_MAX_OPERATIONS'])
+        if isinstance(operations, str):
+            return {'message': operations}, 400
+
+        # the batch works on the table directly, so write out any cached copy first
+        store = cart_store_enabled()
+        if store:
+            cart_store.flush([user_id])
+
+        product_ids = {product_id for _, product_id, _ in operations}
+        stock = product_stock(product_ids)
+        current = dict(db.session.query(CartModel.product_id, CartModel.quantity)
+                       .filter(CartModel.user_id == user_id, CartModel.product_id.in_(product_ids)))
+
+        # Checks run on the cart as it stands after the preceding
+        # operations, so repeated adds cannot exceed stock between them.
+        quantities = dict(current)
+        errors = []
+        for index, (op, product_id, quantity) in enumerate(operations):
+            if op == 'remove':
+                if quantities.pop(product_id, None) is None:
+                    errors.append({'index': index, 'message': 'Item not found in cart'})
+                continue
+            total = quantity + (quantities.get(product_id, 0) if op == 'add' else 0)
+            if stock.get(product_id, -1) < total:
+                errors.append({'index': index, 'message': 'Product not available or insufficient stock'})
+            else:
+                quantities[product_id] = total
+        if errors:
+            return {'message': 'Cart not updated', 'errors': errors}, 400
+
+        removed = [product_id for product_id in current if product_id not in quantities]
+        changed = [{'user_id': user_id, 'product_id': product_id, 'quantity': quantity}
+                   for product_id, quantity in quantities.items() if current.get(product_id) != quantity]
+        if removed:
+            db.session.execute(db.delete(CartModel).where(CartModel.user_id == user_id,
+                                                          CartModel.product_id.in_(removed)))
+        if changed:
+            stmt = dialect_insert(CartModel).values(changed)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=['user_id', 'product_id'],
+                set_={'quantity': stmt.excluded.quantity}
+            ))
+        db.session.commit()
+        if store:
+            cart_store.discard(user_id)
+        return cart_lines(user_id), 200
+
+
+@api_ns.route('/cart/summary')
+class CartSummary(Resource):
+    @api_ns.doc(responses={200: 'Success'}, security='Bearer')
+    @jwt_required()
+    def get(self):
+        user_id = get_jwt_identity()
+        if cart_store_enabled():
+            items = [{
+                'id': line['id'],
+                'product_id': line['product_id'],
+                'name': line['name'],
+                'price': line['price'],
+                'quantity': line['quantity'],
+                'line_total': line['price'] * line['quantity']
+            } for line in stored_cart_lines(user_id)]
+            return {
+                'items': items,
+                'subtotal': sum(item['line_total'] for item in items),
+                'item_count': sum(item['quantity'] for item in items)
+            }, 200
+
+        line_total = (Product.price * CartModel.quantity).label('line_total')
+        lines = db.session.query(
+            CartModel.id, CartModel.product_id, CartModel.quantity, Product.name, Product.price,
+            line_total,
+            db.func.sum(line_total).over().label('subtotal'),
+            db.func.sum(CartModel.quantity).over().label('item_count')
+        ).join(Product, CartModel.product_id == Product.id) \
+            .filter(CartModel.user_id == user_id, Product.deleted_at.is_(None)) \
+            .order_by(CartModel.id).all()
+        return {
+            'items': [{
+                'id': line.id,
+                'product_id': line.product_id,
+                'name': line.name,
+                'price': line.price,
+                'quantity': line.quantity,
+                'line_total': line.line_total
+            } for line in lines],
+            'subtotal': lines[0].subtotal if lines else 0.0,
+            'item_count': lines[0].item_count if lines else 0
+        }, 200
 
 
 @api_ns.route('/cart/<int:item_id>')
@@ -232,6 +965,11 @@ class CartItem(Resource):
     @jwt_required()
     def delete(self, item_id):
         user_id = get_jwt_identity()
+        if cart_store_enabled():
+            if not cart_store.remove(user_id, item_id):
+                return {'message': 'Item not found in cart'}, 404
+            return {'message': 'Item removed from cart'}, 200
+
         cart_item = CartModel.query.filter_by(id=item_id, user_id=user_id).first()
         if not cart_item:
             return {'message': 'Item not found in cart'}, 404
@@ -245,17 +983,29 @@ class CartItem(Resource):
     @jwt_required()
     def put(self, item_id):
         user_id = get_jwt_identity()
+        if cart_store_enabled():
+            product_id = cart_store.product_for_line(user_id, item_id)
+            if product_id is None:
+                return {'message': 'Item not found in cart'}, 404
+            quantity = request.get_json().get('quantity')
+            if not valid_quantity(quantity):
+                return {'message': 'Invalid quantity'}, 400
+            if product_stock([product_id]).get(product_id, -1) < quantity:
+                return {'message': 'Insufficient stock'}, 400
+            cart_store.set_quantity(user_id, item_id, quantity)
+            return {'message': 'Cart item updated'}, 200
+
         cart_item = CartModel.query.filter_by(id=item_id, user_id=user_id).first()
         if not cart_item:
             return {'message': 'Item not found in cart'}, 404
 
         data = request.get_json()
         quantity = data.get('quantity')
-        if not quantity or quantity < 1:
+        if not valid_quantity(quantity):
             return {'message': 'Invalid quantity'}, 400
 
         product = Product.query.get(cart_item.product_id)
-        if product.stock < quantity:
+        if product.deleted_at is not None or product.stock < quantity:
             return {'message': 'Insufficient stock'}, 400
 
         cart_item.quantity = quantity
@@ -263,6 +1013,146 @@ class CartItem(Resource):
         return {'message': 'Cart item updated'}, 200
 
 
+# Guest carts are kept (in the cart store, or the guest_cart table when the
+# store is off) under an X-Cart-Token the server hands out with the first item, and move into the user's cart when that token is sent
+# along with the login request.
+
+GUEST_CART_TOKEN_MAX_LENGTH = 64
+
+
+@api_ns.route('/guest-cart')
+class GuestCart(Resource):
+    @api_ns.doc(responses={200: 'Success'}, params={'X-Cart-Token': {'in': 'header'}})
+    def get(self):
+        token = request.headers.get('X-Cart-Token')
+        lines = guest_carts().guest_lines(token) if token else {}
+        products = cart_products(lines) if lines else {}
+        return [{
+            'product_id': product_id,
+            'name': products[product_id].name,
+            'price': products[product_id].price,
+            'quantity': quantity,
+            'image_url': products[product_id].image_url,
+            'category': products[product_id].category
+        } for product_id, quantity in lines.items() if product_id in products], 200
+
+    @api_ns.expect(cart_model)
+    @api_ns.doc(responses={201: 'Added', 400: 'Bad Request'}, params={'X-Cart-Token': {'in': 'header'}})
+    def post(self):
+        data = request.get_json()
+        product_id = data.get('product_id')
+        quantity = data.get('quantity', 1)
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            return {'message': 'Invalid product_id'}, 400
+        if not valid_quantity(quantity):
+            return {'message': 'Invalid quantity'}, 400
+        token = request.headers.get('X-Cart-Token') or secrets.token_urlsafe(16)
+        if len(token) > GUEST_CART_TOKEN_MAX_LENGTH:
+            return {'message': 'Invalid cart token'}, 400
+        in_cart = guest_carts().guest_lines(token).get(product_id, 0)
+        if product_stock([product_id]).get(product_id, -1) < in_cart + quantity:
+            return {'message': 'Product not available or insufficient stock'}, 400
+
+        guest_carts().guest_add(token, product_id, quantity)
+        return {'message': 'Added to cart', 'cart_token': token}, 201, {'X-Cart-Token': token}
+
+
+@api_ns.route('/guest-cart/<int:product_id>')
+class GuestCartItem(Resource):
+    @api_ns.doc(responses={200: 'Success', 404: 'Not Found'}, params={'X-Cart-Token': {'in': 'header'}})
+    def delete(self, product_id):
+        token = request.headers.get('X-Cart-Token')
+        if not token or not guest_carts().guest_remove(token, product_id):
+            return {'message': 'Item not found in cart'}, 404
+        return {'message': 'Item removed from cart'}, 200
+
+
+
+# Checkout Routes
+
+@api_ns.route('/checkout')
+class Checkout(Resource):
+    @api_ns.doc(responses={201: 'Created', 400: 'Bad Request', 409: 'Insufficient stock'}, security='Bearer')
+    @jwt_required()
+    def post(self):
+        user_id = get_jwt_identity()
+        reservation_sweeper.ensure_started(current_app._get_current_object())
+        # checkout reads and clears the cart table, so save any cached copy first
+        store = cart_store_enabled()
+        if store:
+            cart_store.flush([user_id])
+
+        lines = db.session.query(
+            CartModel.product_id, CartModel.quantity, Product.price, Product.category
+        ).join(Product, CartModel.product_id == Product.id) \
+            .filter(CartModel.user_id == user_id, Product.deleted_at.is_(None)) \
+            .order_by(CartModel.product_id).all()
+        if not lines:
+            return {'message': 'Cart is empty'}, 400
+        # a non-positive line would add stock back and lower the total
+        invalid = [line.product_id for line in lines if line.quantity < 1]
+        if invalid:
+            return {'message': 'Invalid quantity in cart', 'product_ids': invalid}, 400
+
+        # Conditional decrements: the stock check and the write are one
+        # statement per line, so concurrent buyers can never oversell. Lines
+        # are taken in product_id order to keep lock order consistent.
+        products = Product.__table__
+        unavailable = []
+        for line in lines:
+            result = db.session.execute(
+                db.update(products)
+                .where(products.c.id == line.product_id, products.c.stock >= line.quantity)
+                .values(stock=products.c.stock - line.quantity)
+            )
+            if result.rowcount == 0:
+                unavailable.append(line.product_id)
+        if unavailable:
+            db.session.rollback()
+            return {'message': 'Insufficient stock', 'product_ids': unavailable}, 409
+
+        checkout_id = str(uuid.uuid4())
+        expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['RESERVATION_TTL'])
+        db.session.add_all([
+            Reservation(checkout_id=checkout_id, user_id=user_id, product_id=line.product_id,
+                        quantity=line.quantity, expires_at=expires_at)
+            for line in lines
+        ])
+        db.session.execute(db.delete(CartModel).where(CartModel.user_id == user_id))
+        db.session.commit()
+        if store:
+            cart_store.discard(user_id)
+
+        for line in lines:
+            invalidate_product(line.product_id, line.category)
+        return {
+            'checkout_id': checkout_id,
+            'expires_at': expires_at.isoformat(),
+            'items': [{'product_id': line.product_id, 'quantity': line.quantity} for line in lines],
+            'total': sum(line.price * line.quantity for line in lines)
+        }, 201
+
+
+@api_ns.route('/checkout/<string:checkout_id>/confirm')
+class CheckoutConfirm(Resource):
+    @api_ns.doc(responses={200: 'Success', 404: 'Not Found'}, security='Bearer')
+    @jwt_required()
+    def post(self, checkout_id):
+        user_id = get_jwt_identity()
+        result = db.session.execute(
+            db.update(Reservation)
+            .where(Reservation.checkout_id == checkout_id, Reservation.user_id == user_id,
+                   Reservation.status == 'held', Reservation.expires_at > datetime.utcnow())
+            .values(status='confirmed')
+        )
+        if result.rowcount == 0:
+            db.session.rollback()
+            return {'message': 'Checkout not found or expired'}, 404
+
+        db.session.commit()
+        return {'message': 'Checkout confirmed'}, 200
+
+
 
 # Admin Product Routes
 
@@ -270,12 +1160,8 @@ class CartItem(Resource):
 class AdminProducts(Resource):
     @api_ns.expect(product_model)
     @api_ns.doc(responses={201: 'Created', 403: 'Forbidden'}, security='Bearer')
-    @jwt_required()
+    @admin_required
     def post(self):
-        user_id = get_jwt_identity()
-        if not is_admin(user_id):
-            return {'message': 'Admin access required'}, 403
-
         data = request.get_json()
         name = data.get('name')
         description = data.get('description')
@@ -296,43 +1182,94 @@ class AdminProducts(Resource):
             category=category
         )
         db.session.add(new_product)
+        db.session.flush()
+        facets.product_added(new_product.category, new_product.price)
         db.session.commit()
+        invalidate_product(new_product.id, new_product.category)
 
         return {'message': 'Product created'}, 201
 
-    @api_ns.doc(responses={200: 'Success', 403: 'Forbidden'}, security='Bearer')
-    @jwt_required()
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request', 403: 'Forbidden'},
+                params=product_list_params, security='Bearer')
+    @admin_required
     def get(self):
-        user_id = get_jwt_identity()
-        if not is_admin(user_id):
-            return {'message': 'Admin access required'}, 403
+        return json_response(list_products(request.args))
+
+
+@api_ns.route('/admin/products/import')
+class AdminProductImport(Resource):
+    @api_ns.doc(responses={200: 'Success', 202: 'Accepted', 400: 'Bad Request', 403: 'Forbidden',
+                           415: 'Unsupported Media Type'},
+                params=bulk_params, security='Bearer',
+                description='Stream products as NDJSON (application/x-ndjson) or CSV (text/csv) with a header row. '
+                            'With "Prefer: respond-async" the body is spooled to disk and imported by a '
+                            'background job; poll the Location of the 202 response for the report.')
+    @admin_required
+    def post(self):
+        try:
+            chunk_size = parse_chunk_size(request.args.get('chunk_size'))
+        except ValueError:
+            return {'message': 'Invalid chunk_size'}, 400
+        if request.mimetype not in PRODUCT_IMPORT_FORMATS:
+            return {'message': 'Content-Type must be application/x-ndjson or text/csv'}, 415
+
+        if 'respond-async' in request.headers.get('Prefer', ''):
+            fd, path = tempfile.mkstemp(prefix='import-', dir=current_app.config['JOB_SPOOL_DIR'])
+            with os.fdopen(fd, 'wb') as spool:
+                shutil.copyfileobj(request.stream, spool)
+            params = {'path': path, 'mimetype': request.mimetype, 'chunk_size': chunk_size}
+            job = jobs().submit('product_import', params, get_jwt_identity())
+            return job_accepted(job, {'Preference-Applied': 'respond-async'})
+
+        report = import_product_stream(request.stream, request.mimetype, chunk_size)
+        if 'aborted' in report:
+            # earlier rows are committed; say which ones made it in
+            return {'message': import_aborted_message(report), **report}, 400
+        return report, 200
+
+
+@api_ns.route('/admin/products/export')
+class AdminProductExport(Resource):
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request', 403: 'Forbidden'},
+                params={'format': 'ndjson (default) or csv', **bulk_params}, security='Bearer',
+                description='CSV text cells starting with =, +, -, @, tab or CR get a leading apostrophe so '
+                            'spreadsheets do not run them; export NDJSON to re-import exactly.')
+    @admin_required
+    def get(self):
+        try:
+            chunk_size = parse_chunk_size(request.args.get('chunk_size'))
+        except ValueError:
+            return {'message': 'Invalid chunk_size'}, 400
+
+        export_format = request.args.get('format', 'ndjson')
+        if export_format == 'ndjson':
+            encode, mimetype = bulk.export_ndjson, 'application/x-ndjson'
+        elif export_format == 'csv':
+            encode, mimetype = bulk.export_csv, 'text/csv'
+        else:
+            return {'message': 'Invalid format'}, 400
 
-        products = Product.query.all()
-        return [{
-            'id': p.id,
-            'name': p.name,
-            'description': p.description,
-            'price': p.price,
-            'image_url': p.image_url,
-            'stock': p.stock,
-            'category': p.category
-        } for p in products], 200
+        body = encode(bulk.iter_products(chunk_size))
+        headers = {'Content-Disposition': f'attachment; filename=products.{export_format}',
+                   'Vary': 'Accept-Encoding'}
+        encoding = serializers.negotiate_encoding(request.accept_encodings)
+        if encoding:
+            body = serializers.compress_stream(body, encoding)
+            headers['Content-Encoding'] = encoding
+        return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
 
 
 @api_ns.route('/admin/products/<int:product_id>')
 class AdminProduct(Resource):
     @api_ns.expect(product_model)
     @api_ns.doc(responses={200: 'Success', 403: 'Forbidden', 404: 'Not Found'}, security='Bearer')
-    @jwt_required()
+    @admin_required
     def put(self, product_id):
-        user_id = get_jwt_identity()
-        if not is_admin(user_id):
-            return {'message': 'Admin access required'}, 403
-
         product = Product.query.get(product_id)
-        if not product:
+        if not product or product.deleted_at is not None:
             return {'message': 'Product not found'}, 404
 
+        old_category, old_price = product.category, product.price
         data = request.get_json()
         product.name = data.get('name', product.name)
         product.description = data.get('description', product.description)
@@ -341,20 +1278,145 @@ class AdminProduct(Resource):
         product.stock = data.get('stock', product.stock)
         product.category = data.get('category', product.category)
 
+        db.session.flush()
+        facets.product_changed(old_category, old_price, product.category, product.price)
         db.session.commit()
+        invalidate_product(product_id, old_category, product.category)
         return {'message': 'Product updated'}, 200
 
     @api_ns.doc(responses={200: 'Success', 403: 'Forbidden', 404: 'Not Found'}, security='Bearer')
-    @jwt_required()
+    @admin_required
     def delete(self, product_id):
-        user_id = get_jwt_identity()
-        if not is_admin(user_id):
-            return {'message': 'Admin access required'}, 403
-
         product = Product.query.get(product_id)
-        if not product:
+        if not product or product.deleted_at is not None:
             return {'message': 'Product not found'}, 404
 
-        db.session.delete(product)
+        # soft delete, so the change feed can tell clients to drop it
+        category, price = product.category, product.price
+        product.deleted_at = datetime.utcnow()
+        db.session.flush()
+        facets.product_removed(category, price)
         db.session.commit()
-        return {'message': 'Product deleted'}, 200
+        invalidate_product(product_id, category)
+        # carts holding the product are emptied in the background
+        job = jobs().submit('cart_cleanup', {'product_ids': [product_id]}, get_jwt_identity())
+        return {'message': 'Product deleted', 'cleanup_job_id': job.id}, 200
+
+
+@api_ns.route('/admin/cache')
+class AdminCache(Resource):
+    @api_ns.doc(responses={200: 'Success', 403: 'Forbidden'}, security='Bearer')
+    @admin_required
+    def get(self):
+        return product_cache.stats(), 200
+
+
+# Admin Job Routes
+
+@api_ns.route('/admin/jobs')
+class AdminJobs(Resource):
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request', 403: 'Forbidden'},
+                params={**submission_list_params, 'status': 'queued, running, succeeded or failed'},
+                security='Bearer')
+    @admin_required
+    def get(self):
+        query = Job.query
+        if request.args.get('status'):
+            query = query.filter(Job.status == request.args['status'])
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            rows, next_cursor = keyset_page(query, Job.created_at, Job.id, True, request.args.get('cursor'), limit)
+        except CursorError as e:
+            return {'message': str(e)}, 400
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+        return [job_dict(job) for job in rows], 200, headers
+
+    @api_ns.expect(job_model)
+    @api_ns.doc(responses={202: 'Accepted', 400: 'Bad Request', 403: 'Forbidden'}, security='Bearer')
+    @admin_required
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        kind, params = data.get('kind'), data.get('params') or {}
+        if kind not in ADMIN_JOB_KINDS:
+            return {'message': f"kind must be one of {', '.join(ADMIN_JOB_KINDS)}"}, 400
+        if not isinstance(params, dict):
+            return {'message': 'params must be an object'}, 400
+        product_ids = params.get('product_ids')
+        if product_ids is not None and not (
+                isinstance(product_ids, list) and all(isinstance(p, int) for p in product_ids)):
+            return {'message': 'product_ids must be a list of integers'}, 400
+        return job_accepted(jobs().submit(kind, params, get_jwt_identity()))
+
+
+@api_ns.route('/admin/jobs/<int:job_id>')
+class AdminJob(Resource):
+    @api_ns.doc(responses={200: 'Success', 403: 'Forbidden', 404: 'Not Found'}, security='Bearer')
+    @admin_required
+    def get(self, job_id):
+        job = db.session.get(Job, job_id)
+        if job is None:
+            return {'message': 'Job not found'}, 404
+        return job_dict(job), 200
+
+
+# Admin Contact and Newsletter Routes
+# Rows past RETENTION_DAYS are moved out of these tables by `flask archive`.
+
+@api_ns.route('/admin/contacts')
+class AdminContacts(Resource):
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request', 403: 'Forbidden'},
+                params=submission_list_params, security='Bearer')
+    @admin_required
+    def get(self):
+        return json_response(list_submissions('contact', request.args))
+
+
+@api_ns.route('/admin/contacts/export')
+class AdminContactExport(Resource):
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request', 403: 'Forbidden'},
+                params=bulk_params, security='Bearer')
+    @admin_required
+    def get(self):
+        return export_submissions('contact')
+
+
+@api_ns.route('/admin/newsletter')
+class AdminNewsletter(Resource):
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request', 403: 'Forbidden'},
+                params=submission_list_params, security='Bearer')
+    @admin_required
+    def get(self):
+        return json_response(list_submissions('newsletter', request.args))
+
+
+@api_ns.route('/admin/newsletter/export')
+class AdminNewsletterExport(Resource):
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request', 403: 'Forbidden'},
+                params=bulk_params, security='Bearer')
+    @admin_required
+    def get(self):
+        return export_submissions('newsletter')
+
+
+# Admin User Routes
+
+@api_ns.route('/admin/users/<int:user_id>/role')
+class AdminUserRole(Resource):
+    @api_ns.expect(role_model)
+    @api_ns.doc(responses={200: 'Success', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found'}, security='Bearer')
+    @admin_required
+    def put(self, user_id):
+        user = User.query.get(user_id)
+        if not user:
+            return {'message': 'User not found'}, 404
+
+        data = request.get_json()
+        if not isinstance(data.get('is_admin'), bool):
+            return {'message': 'is_admin must be true or false'}, 400
+
+        if user.is_admin != data['is_admin']:
+            user.is_admin = data['is_admin']
+            user.role_changed_at = datetime.utcnow()
+            db.session.commit()
+            role_changes.record(user.id, user.role_changed_at)
+        return {'message': 'Role updated'}, 200
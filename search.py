@@ -0,0 +1,69 @@
+import re
+
+from sqlalchemy import DDL, event, text
+
+from extensions import db
+from engine import read_session
+from models import Product
+
+
+# External-content FTS5 index over products(name, description). Triggers keep
+# it in sync with every write path, including bulk imports; the update
+# trigger only fires when indexed columns change, so stock updates from
+# checkout do not touch it.
+FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, content='products', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+)
+
+for statement in FTS_DDL:
+    event.listen(Product.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+# bm25() weights per column: a hit in the name counts ten times a hit in the description
+SEARCH_SQL = text("""
+    SELECT p.id, p.name, p.description, p.price, p.image_url, p.stock, p.category
+    FROM products_fts
+    JOIN products AS p ON p.id = products_fts.rowid
+    WHERE products_fts MATCH :match AND (:category IS NULL OR p.category = :category)
+      AND p.deleted_at IS NULL
+    ORDER BY bm25(products_fts, 10.0, 1.0), p.id
+    LIMIT :limit OFFSET :offset
+""")
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: every term must match, as a prefix."""
+    terms = TERM_RE.findall(query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_products(query, category=None, limit=20, offset=0):
+    match = match_expression(query)
+    if not match:
+        return []
+
+    session = read_session()
+    if session.get_bind().dialect.name != 'sqlite':
+        # no FTS5 outside SQLite; fall back to a (slow) substring scan
+        q = session.query(Product).filter(Product.deleted_at.is_(None))
+        for term in TERM_RE.findall(query):
+            q = q.filter(db.or_(Product.name.ilike(f'%{term}%'), Product.description.ilike(f'%{term}%')))
+        if category:
+            q = q.filter(Product.category == category)
+        return q.order_by(Product.id).limit(limit).offset(offset).all()
+
+    return session.execute(SEARCH_SQL, {
+        'match': match, 'category': category, 'limit': limit, 'offset': offset
+    }).all()
@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import json
+import zlib
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+PRODUCT_FIELDS = ('id', 'name', 'description', 'price', 'image_url', 'stock', 'category')
+
+# bodies smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def product_dict(row, fields=PRODUCT_FIELDS):
+    return {field: getattr(row, field) for field in fields}
+
+
+def encode_product(row):
+    return dumps(product_dict(row))
+
+
+def json_array(fragments):
+    return b'[' + b','.join(fragments) + b']'
+
+
+def negotiate_encoding(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of str/bytes chunks on the fly."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        compress_chunk, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+        compress_chunk, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = compress_chunk(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class Representation:
+    """An encoded JSON body with its strong ETag, compressed variants built
+    on first request and kept alongside it in the cache."""
+
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.headers = dict(headers or {})
+        self.headers['Cache-Control'] = 'no-cache'
+        self._variants = {}
+
+    def respond(self, request):
+        encoding = None
+        if len(self.body) >= COMPRESS_MIN_SIZE:
+            encoding = negotiate_encoding(request.accept_encodings)
+
+        # each encoding is a distinct representation, so it gets its own tag
+        etag = f'{self.etag}-{encoding}' if encoding else self.etag
+        headers = dict(self.headers, ETag=f'"{etag}"', Vary='Accept-Encoding')
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304, headers=headers)
+
+        body = self.body
+        if encoding:
+            if encoding not in self._variants:
+                self._variants[encoding] = compress(self.body, encoding)
+            body = self._variants[encoding]
+            headers['Content-Encoding'] = encoding
+        return Response(body, status=200, headers=headers, mimetype='application/json')
@@ -0,0 +1,53 @@
+import hashlib
+import math
+import time
+
+from flask_jwt_extended import JWTManager
+
+from cache import TTLCache
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that skips decoding tokens it has already verified.
+
+    Decoding means base64 and JSON parsing of the header and payload plus
+    an HMAC over both on every @jwt_required() request. Tokens that pass
+    are remembered under their SHA-256 digest in a bounded LRU, so a client
+    reusing its token gets the same claims back from a dict lookup.
+
+    Only tokens that verified are cached, so a tampered token never hits.
+    An entry never outlives the token's `exp` or JWT_VERIFIED_CACHE_TTL.
+    Revocation (the blocklist loader and the role-change check in
+    auth.admin_required) runs after decoding, cached or not.
+    """
+
+    def __init__(self, app=None, add_context_processor=False):
+        self.token_cache = TTLCache()
+        super().__init__(app, add_context_processor)
+
+    def init_app(self, app, add_context_processor=False):
+        super().init_app(app, add_context_processor)
+        # entries verified under another app's key must not carry over
+        self.token_cache.configure(maxsize=app.config['JWT_VERIFIED_CACHE_SIZE'],
+                                   ttl=app.config['JWT_VERIFIED_CACHE_TTL'])
+        self.token_cache.clear()
+
+    # Flask-JWT-Extended has no public hook around token verification, so
+    # this overrides a private method; the version is pinned in
+    # requirements.txt. Recheck the signature when upgrading.
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # CSRF checks compare against a per-request value, so those decode every time
+        if csrf_value is not None or allow_expired or not self.token_cache.maxsize:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = hashlib.sha256(encoded_token.encode('utf-8')).digest()
+        entry = self.token_cache.get(key)
+        if entry is not None:
+            claims, expires_at = entry
+            if expires_at > time.time():
+                return dict(claims)
+            self.token_cache.delete(key)
+
+        claims = super()._decode_jwt_from_config(encoded_token)
+        self.token_cache.set(key, (claims, claims.get('exp', math.inf)))
+        return dict(claims)
@@ -0,0 +1,48 @@
+import abc
+import atexit
+import os
+import threading
+
+
+class ProcessWorker(abc.ABC):
+    """Base for background workers that live inside a web process: the
+    reservation sweeper, the write-behind queue, the cart store and the
+    job runner.
+
+    Started lazily from the first request that needs it, so each worker of
+    a pre-fork server starts its own after the fork instead of inheriting
+    the parent's dead threads. Stopped at interpreter exit, by the process
+    that started it only.
+
+    Subclasses implement `_start(app)`, which runs once per process with
+    `self.app` set, and `_shutdown()`.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self, app):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self.app = app
+                self._start(app)
+                self._pid = os.getpid()
+                atexit.register(self.stop)
+
+    def stop(self):
+        if self._pid != os.getpid():
+            return
+        self._pid = None
+        self._shutdown()
+
+    @abc.abstractmethod
+    def _start(self, app):
+        pass
+
+    @abc.abstractmethod
+    def _shutdown(self):
+        pass
@@ -0,0 +1,171 @@
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+
+from extensions import db
+from dbutil import dialect_insert
+from models import Contact, Newsletter
+from workers import ProcessWorker
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class WriteBehindQueue(ProcessWorker):
+    """Buffers newsletter and contact submissions and writes them in grouped
+    transactions from a background thread.
+
+    A flush happens once WRITE_BEHIND_FLUSH_SIZE submissions are pending or
+    every WRITE_BEHIND_FLUSH_INTERVAL seconds, and again at interpreter exit.
+    Newsletter emails are deduplicated against an in-memory set of known
+    addresses, loaded once per process; the insert still ignores conflicts
+    so subscriptions accepted by other workers cannot fail a batch.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.flush_size = None
+        self.flush_interval = None
+        self.max_pending = None
+        self._contacts = []
+        self._subscriptions = []
+        self._known_emails = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Condition()
+        self._flush_lock = threading.Lock()
+
+    def _start(self, app):
+        with self._wakeup:
+            self.flush_size = app.config['WRITE_BEHIND_FLUSH_SIZE']
+            self.flush_interval = app.config['WRITE_BEHIND_FLUSH_INTERVAL']
+            self.max_pending = app.config['WRITE_BEHIND_MAX_PENDING']
+            self._contacts, self._subscriptions = [], []
+            self._known_emails = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def subscribe(self, email):
+        """Queue a subscription; returns False if the email is already known."""
+        known = self._load_known_emails()
+        with self._wakeup:
+            if email in known:
+                return False
+            self._check_capacity()
+            known.add(email)
+            self._subscriptions.append({'email': email, 'created_at': datetime.utcnow()})
+            self._notify_if_full()
+        return True
+
+    def contact(self, name, email, message):
+        with self._wakeup:
+            self._check_capacity()
+            self._contacts.append({'name': name, 'email': email, 'message': message,
+                                   'created_at': datetime.utcnow()})
+            self._notify_if_full()
+
+    def pending(self):
+        with self._wakeup:
+            return len(self._contacts) + len(self._subscriptions)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._wakeup:
+                contacts, self._contacts = self._contacts, []
+                subscriptions, self._subscriptions = self._subscriptions, []
+            if not contacts and not subscriptions:
+                return 0
+
+            with self.app.app_context():
+                try:
+                    self._write(contacts, subscriptions)
+                except OperationalError:
+                    # database unavailable: keep everything for the next flush
+                    db.session.rollback()
+                    self._requeue(contacts, subscriptions)
+                    raise
+                except Exception:
+                    # some row was rejected; it must not hold back the others
+                    db.session.rollback()
+                    return self._write_each(contacts, subscriptions)
+            return len(contacts) + len(subscriptions)
+
+    def _shutdown(self):
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def _write(self, contacts, subscriptions):
+        if contacts:
+            db.session.execute(db.insert(Contact.__table__), contacts)
+        if subscriptions:
+            db.session.execute(
+                dialect_insert(Newsletter).on_conflict_do_nothing(index_elements=['email']),
+                subscriptions
+            )
+        db.session.commit()
+
+    def _write_each(self, contacts, subscriptions):
+        """Save rows one at a time, dropping (and logging) the ones the
+        database rejects. Returns the number saved."""
+        rows = [(contact, None) for contact in contacts] + [(None, sub) for sub in subscriptions]
+        written = 0
+        for index, (contact, subscription) in enumerate(rows):
+            try:
+                self._write([contact] if contact else [], [subscription] if subscription else [])
+                written += 1
+            except OperationalError:
+                db.session.rollback()
+                self._requeue([c for c, _ in rows[index:] if c], [s for _, s in rows[index:] if s])
+                raise
+            except Exception:
+                db.session.rollback()
+                logger.exception('Dropped a write-behind %s the database rejected',
+                                 'contact' if contact else 'subscription')
+                if subscription and self._known_emails is not None:
+                    self._known_emails.discard(subscription['email'])
+        return written
+
+    def _requeue(self, contacts, subscriptions):
+        with self._wakeup:
+            self._contacts[:0] = contacts
+            self._subscriptions[:0] = subscriptions
+
+    def _load_known_emails(self):
+        if self._known_emails is None:
+            with self._flush_lock:
+                if self._known_emails is None:
+                    with self.app.app_context():
+                        rows = db.session.execute(
+                            db.select(Newsletter.email).execution_options(yield_per=10000)
+                        )
+                        self._known_emails = {email for email, in rows}
+        return self._known_emails
+
+    def _check_capacity(self):
+        if len(self._contacts) + len(self._subscriptions) >= self.max_pending:
+            raise QueueFull('Write-behind queue is full')
+
+    def _notify_if_full(self):
+        if len(self._contacts) + len(self._subscriptions) >= self.flush_size:
+            self._wakeup.notify()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._wakeup:
+                self._wakeup.wait(self.flush_interval)
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Write-behind flush failed')